@@ -1,7 +1,7 @@
 import datetime
 
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
 import streamlit as st
 
 from utils import (
@@ -10,11 +10,16 @@ from utils import (
     chart_layout,
     check_data_warnings,
     compute_insights,
+    covers_whole_months,
     date_filter,
     format_year_month,
     inject_global_css,
     load_all,
+    load_filter_options,
+    load_monthly_totals,
     render_drilldown,
+    slice_date_range,
+    slice_monthly_totals,
 )
 
 # Must be first Streamlit command — applies to all pages via st.navigation
@@ -27,6 +32,194 @@ st.set_page_config(
 inject_global_css()
 
 
+@st.cache_data(show_spinner=False)
+def _spend_summary(_df_exp, _df_income, start, end, card):
+    """Month × category spend, monthly income, insights and monthly chart for one filter.
+
+    Keyed on (start, end, card) only: the frames are what dashboard() derives from
+    load_all() for exactly that selection, and Reload/override saves clear every
+    cache. Bar clicks and drilldown picks rerun with the same key, so they skip the
+    aggregation and the figure build; the figure comes back as a plain dict.
+    """
+    # Only needed on a cache miss — keeps Plotly off the import path of the
+    # no-data / error page and of every cached rerun.
+    import plotly.graph_objects as go
+
+    # Ranges made of whole months slice the cached pivot; a custom range that
+    # splits a month falls back to aggregating the rows.
+    options = load_filter_options()
+    if covers_whole_months(start, end, options["min_date"], options["max_date"]):
+        monthly_cat = slice_monthly_totals(load_monthly_totals(), "expense", card, start, end)
+    else:
+        monthly_cat = _df_exp.pivot_table(
+            index="YearMonth", columns="Category", values="Amount", aggfunc="sum",
+            observed=True,
+        ).fillna(0.0)
+
+    insights = compute_insights(_df_exp)
+
+    monthly = monthly_cat.sum(axis=1).rename("Total").reset_index()
+    monthly["Month"] = monthly["YearMonth"].map(format_year_month)
+    label_to_ym      = dict(zip(monthly["Month"], monthly["YearMonth"]))
+    n_months    = len(monthly)
+    avg_monthly = monthly["Total"].mean() if n_months else 0
+
+    # Income per month — feeds both the chart and the Income This Month card.
+    # Rows are date-sorted (load_all), so first-seen key order is already
+    # chronological and groupby can skip sorting its keys.
+    monthly_income = _df_income.groupby("YearMonth", sort=False)["Amount"].sum()
+
+    fig_monthly = go.Figure()
+    # Income bars (behind expenses) — only when checking data is present
+    if not monthly_income.empty:
+        fig_monthly.add_trace(go.Bar(
+            x=monthly_income.index.map(format_year_month), y=monthly_income.to_numpy(),
+            marker_color="#10B981", marker_opacity=0.35,
+            name="Income",
+            hovertemplate="<b>%{x}</b><br>Income: $%{y:,.0f}<extra></extra>",
+        ))
+    fig_monthly.add_trace(go.Bar(
+        x=monthly["Month"], y=monthly["Total"],
+        marker_color=ACCENT, marker_opacity=1.0,
+        name="Spend",
+        hovertemplate="<b>%{x}</b><br>$%{y:,.0f}<extra></extra>",
+    ))
+    fig_monthly.add_trace(go.Scatter(
+        x=monthly["Month"], y=[avg_monthly] * len(monthly),
+        mode="lines",
+        line=dict(color="#94A3B8", width=1.5, dash="dash"),
+        name="Avg spend",
+        hovertemplate="Avg: $%{y:,.0f}<extra></extra>",
+    ))
+    fig_monthly.update_layout(
+        plot_bgcolor="white", paper_bgcolor="white",
+        height=280, margin=dict(l=0, r=0, t=10, b=0),
+        bargap=0.3,
+        font=dict(family="DM Sans"),
+        xaxis=dict(showgrid=False, tickfont=dict(size=12, color="#64748B", family="DM Sans")),
+        yaxis=dict(showgrid=True, gridcolor="rgba(0,0,0,0.04)",
+                   tickprefix="$", tickformat=",.0f",
+                   tickfont=dict(size=12, color="#64748B", family="DM Sans")),
+        legend=dict(orientation="h", y=1.12, x=1, xanchor="right",
+                    font=dict(size=12, color="#64748B", family="DM Sans")),
+        # Keep zoom and legend toggles across reruns (bar clicks, filter changes)
+        # instead of resetting the view each time the figure is sent again.
+        uirevision="dash_monthly",
+    )
+
+    return monthly_cat, monthly_income, insights, fig_monthly.to_dict(), label_to_ym
+
+
+@st.cache_data(show_spinner=False)
+def _hero_metrics(_monthly_cat, _monthly_income, start, end, card, current_year) -> dict:
+    """Scalar hero-card numbers for one filter selection (same key as _spend_summary).
+
+    YTD spend covers every card for current_year, so it reads the full
+    load_monthly_totals() pivot rather than the filtered _monthly_cat.
+    """
+    # monthly_cat rows are the months with expenses, ascending — the last one is
+    # the current month and the (up to) three before it are the baseline.
+    monthly_totals = _monthly_cat.sum(axis=1)
+    current_period = int(monthly_totals.index[-1])
+    this_month_amt = monthly_totals.iloc[-1]
+    last_3         = monthly_totals.iloc[-4:-1]
+
+    ytd_by_month = slice_monthly_totals(load_monthly_totals(), "expense")
+    return {
+        "this_month":        this_month_amt,
+        "mom_delta":         this_month_amt - monthly_totals.get(current_period - 1, 0),
+        "avg_3m":            last_3.mean() if len(last_3) else 0,
+        "ytd":               ytd_by_month[ytd_by_month.index // 12 == current_year].to_numpy().sum(),
+        "income_this_month": _monthly_income.get(current_period, 0),
+    }
+
+
+@st.cache_data(show_spinner=False)
+def _category_breakdown(_monthly_cat, start, end, card):
+    """Top-10 category names and the Spending by Category rows HTML.
+
+    Same (start, end, card) key as _spend_summary, whose monthly_cat it is built
+    from, so reruns that don't change the filters reuse the rendered string.
+    """
+    cat = (
+        _monthly_cat.sum()
+        .sort_values(ascending=False)
+        .rename("Total").reset_index()
+    )
+    total_spend = cat["Total"].sum()
+    cat["Pct"] = cat["Total"] / total_spend * 100
+
+    # Per-category trend vs 3-month baseline: last row is the current month, the
+    # (up to) three before it the baseline
+    current_by_cat  = _monthly_cat.iloc[-1]
+    baseline        = _monthly_cat.iloc[-4:-1]
+    baseline_by_cat = baseline.sum() / len(baseline) if len(baseline) else pd.Series(dtype=float)
+
+    # Trend columns for the top 10 as arrays; only the final string join is per row
+    top   = cat.head(10)
+    this_m = current_by_cat.reindex(top["Category"]).fillna(0).to_numpy()
+    base   = baseline_by_cat.reindex(top["Category"]).fillna(0).to_numpy()
+    has_base = base > 0
+    pct_chg  = np.divide(this_m - base, base, out=np.zeros_like(base), where=has_base)
+    up, down = has_base & (pct_chg > 0.10), has_base & (pct_chg < -0.10)
+    trend_icon  = np.select([~has_base, up, down], ["◆", "▲", "▼"], "→")
+    trend_color = np.select([up, down], ["#DC2626", "#16A34A"], "#94A3B8")
+    trend_label = np.select(
+        [~has_base, up | down], ["new", np.char.mod("%+.0f%%", pct_chg * 100)], "stable",
+    )
+    dot_color = [CAT_COLORS[i % len(CAT_COLORS)] for i in range(len(top))]
+
+    row_tpl = """
+<div style="display:flex;align-items:center;padding:10px 0;border-bottom:1px solid #F1F5F9;">
+  <div style="width:10px;height:10px;border-radius:50%;background:{0};flex-shrink:0;margin-right:12px;"></div>
+  <div style="flex:1;font-family:'DM Sans',sans-serif;font-size:14px;color:#0F172A;">{1}</div>
+  <div style="font-family:'DM Sans',sans-serif;font-size:12px;color:#94A3B8;margin-right:20px;width:32px;text-align:right;">{2:.0f}%</div>
+  <div style="font-family:'DM Mono',monospace;font-size:15px;color:#0F172A;margin-right:20px;width:72px;text-align:right;">${3:,.0f}</div>
+  <div style="font-family:'DM Sans',sans-serif;font-size:13px;font-weight:600;color:{4};width:56px;text-align:right;">{5} {6}</div>
+</div>"""
+    rows_html = "".join(
+        row_tpl.format(*fields)
+        for fields in zip(dot_color, top["Category"], top["Pct"], top["Total"],
+                          trend_color, trend_icon, trend_label)
+    )
+
+    return top["Category"].tolist(), rows_html
+
+
+@st.fragment
+def _monthly_chart(fig_monthly: dict, label_to_ym: dict, df_exp: pd.DataFrame) -> None:
+    """Monthly Spend chart + the drilldown for a clicked bar.
+
+    A fragment, so a bar click reruns only this block instead of all of dashboard().
+    """
+    monthly_event = st.plotly_chart(fig_monthly, use_container_width=True, on_select="rerun", key="dash_monthly")
+    st.markdown("<div style='margin-bottom:24px;'></div>", unsafe_allow_html=True)
+
+    if monthly_event.selection["points"]:
+        sel_label = monthly_event.selection["points"][0].get("x")
+        sel_ym    = label_to_ym.get(sel_label)
+        if sel_ym is not None:
+            df_month_drill = df_exp[df_exp["YearMonth"] == sel_ym]
+            if not df_month_drill.empty:
+                render_drilldown(
+                    df_month_drill.sort_values("Amount", ascending=False),
+                    f"{sel_label} — {len(df_month_drill)} transactions",
+                )
+
+
+@st.fragment
+def _category_drilldown(top_cats: list, df_exp: pd.DataFrame) -> None:
+    """Category picker + drilldown table; picking a category reruns only this block."""
+    drill_options = ["— Select a category to drill in —"] + top_cats
+    drill_cat = st.selectbox(
+        "Drill into category", drill_options,
+        label_visibility="collapsed", key="dash_cat_drill",
+    )
+    if drill_cat != "— Select a category to drill in —":
+        df_drill = df_exp[df_exp["Category"] == drill_cat].sort_values("Amount", ascending=False)
+        render_drilldown(df_drill, f"{drill_cat} — {len(df_drill)} transactions")
+
+
 def dashboard():
     # ── Load data ─────────────────────────────────────────────────────────────
     df_all = load_all()
@@ -55,15 +248,14 @@ def dashboard():
 """, unsafe_allow_html=True)
 
     # ── Filter bar ────────────────────────────────────────────────────────────
-    start, end, selected_card = date_filter(df_all, key="dash", default_preset="Last 3 months")
+    start, end, selected_card = date_filter(key="dash", default_preset="Last 3 months")
 
     st.markdown("<div style='margin-bottom:16px;'></div>", unsafe_allow_html=True)
 
     # ── Apply filters ─────────────────────────────────────────────────────────
-    df = df_all.copy()
+    df = slice_date_range(df_all, start, end)
     if selected_card != "All cards":
         df = df[df["Card"] == selected_card]
-    df = df[(df["Date"].dt.date >= start) & (df["Date"].dt.date <= end)]
 
     if df.empty:
         st.warning("No transactions match the current filters.")
@@ -86,24 +278,20 @@ def dashboard():
         st.stop()
 
     # ── Compute metrics ───────────────────────────────────────────────────────
-    monthly_totals = df_exp.groupby("YearMonth")["Amount"].sum().sort_index()
-    current_period = df_exp["YearMonth"].max()
-    this_month_amt = monthly_totals.get(current_period, 0)
-    prev_period    = current_period - 1
-    mom_delta      = this_month_amt - monthly_totals.get(prev_period, 0)
-
-    complete_periods = sorted([p for p in monthly_totals.index if p < current_period])
-    last_3 = complete_periods[-3:] if len(complete_periods) >= 3 else complete_periods
-    avg_3m = monthly_totals[monthly_totals.index.isin(last_3)].mean() if last_3 else 0
+    monthly_cat, monthly_income, insights, fig_monthly, label_to_ym = _spend_summary(
+        df_exp, df_income, start, end, selected_card,
+    )
 
     current_year = datetime.date.today().year
-    ytd = df_all[
-        (df_all["Date"].dt.year == current_year) & (df_all["RecordType"] == "expense")
-    ]["Amount"].sum()
+    kpis = _hero_metrics(monthly_cat, monthly_income, start, end, selected_card, current_year)
+    this_month_amt = kpis["this_month"]
+    mom_delta      = kpis["mom_delta"]
+    avg_3m         = kpis["avg_3m"]
+    ytd            = kpis["ytd"]
 
     # Income metrics (only computed if checking data is loaded)
     if has_income:
-        income_this_month = df_income[df_income["YearMonth"] == current_period]["Amount"].sum()
+        income_this_month = kpis["income_this_month"]
         net_this_month    = income_this_month - this_month_amt
         net_class = "down" if net_this_month >= 0 else "up"   # green if saving, red if over
         net_arrow = "▼" if net_this_month >= 0 else "▲"
@@ -144,7 +332,6 @@ def dashboard():
 """, unsafe_allow_html=True)
 
     # ── Insights ──────────────────────────────────────────────────────────────
-    insights = compute_insights(df_exp)
     st.markdown("<div class='section-title'>Insights</div>", unsafe_allow_html=True)
     if not insights:
         st.markdown(
@@ -153,145 +340,42 @@ def dashboard():
             unsafe_allow_html=True,
         )
     if insights:
-        icon_map = {"spike": "↑", "drop": "↓", "info": "◆"}
-        cards_html = ""
-        for ins in insights:
-            ind   = ins["indicator"]
-            icon  = icon_map.get(ind, "◆")
-            amt   = ins["dollar_amount"]
-            chg   = ins["dollar_change"]
-            chg_s = f"+${chg:,.0f}" if chg > 0 else f"-${abs(chg):,.0f}"
-            delta_col = "#DC2626" if ind == "spike" else ("#16A34A" if ind == "drop" else "#1B3A6B")
-            cards_html += f"""
-<div class="insight-card {ind}">
-    <div class="insight-icon" style="color:{delta_col};">{icon}</div>
-    <div class="insight-headline">{ins['headline']}</div>
-    <div class="insight-amount">${amt:,.0f}</div>
-    <div class="insight-delta" style="color:{delta_col};">{chg_s} vs avg</div>
+        icon_map  = {"spike": "↑", "drop": "↓", "info": "◆"}
+        color_map = {"spike": "#DC2626", "drop": "#16A34A"}
+        card_tpl = """
+<div class="insight-card {indicator}">
+    <div class="insight-icon" style="color:{color};">{icon}</div>
+    <div class="insight-headline">{headline}</div>
+    <div class="insight-amount">${dollar_amount:,.0f}</div>
+    <div class="insight-delta" style="color:{color};">{sign}${abs_change:,.0f} vs avg</div>
 </div>"""
+        cards_html = "".join(
+            card_tpl.format_map({
+                **ins,
+                "icon":       icon_map.get(ins["indicator"], "◆"),
+                "color":      color_map.get(ins["indicator"], "#1B3A6B"),
+                "sign":       "+" if ins["dollar_change"] > 0 else "-",
+                "abs_change": abs(ins["dollar_change"]),
+            })
+            for ins in insights
+        )
         st.markdown(f"<div class='insight-row'>{cards_html}</div>", unsafe_allow_html=True)
 
     st.markdown("<div style='margin-bottom:24px;'></div>", unsafe_allow_html=True)
 
     # ── Monthly spend chart ───────────────────────────────────────────────────
-    monthly = (
-        df_exp.groupby("YearMonth")["Amount"]
-        .sum().reset_index()
-        .rename(columns={"Amount": "Total"})
-        .sort_values("YearMonth")
-    )
-    monthly["YearMonthStr"] = monthly["YearMonth"].astype(str)
-    monthly["Month"]        = monthly["YearMonthStr"].map(format_year_month)
-    label_to_ym             = dict(zip(monthly["Month"], monthly["YearMonthStr"]))
-    n_months    = len(monthly)
-    avg_monthly = monthly["Total"].mean() if n_months else 0
-
-    fig_monthly = go.Figure()
-    # Income bars (behind expenses) — only when checking data is present
-    if has_income:
-        monthly_income = (
-            df_income.groupby("YearMonth")["Amount"]
-            .sum().reset_index()
-            .rename(columns={"Amount": "Income"})
-            .sort_values("YearMonth")
-        )
-        monthly_income["YearMonthStr"] = monthly_income["YearMonth"].astype(str)
-        monthly_income["Month"]        = monthly_income["YearMonthStr"].map(format_year_month)
-        fig_monthly.add_trace(go.Bar(
-            x=monthly_income["Month"], y=monthly_income["Income"],
-            marker_color="#10B981", marker_opacity=0.35,
-            name="Income",
-            hovertemplate="<b>%{x}</b><br>Income: $%{y:,.0f}<extra></extra>",
-        ))
-    fig_monthly.add_trace(go.Bar(
-        x=monthly["Month"], y=monthly["Total"],
-        marker_color=ACCENT, marker_opacity=1.0,
-        name="Spend",
-        hovertemplate="<b>%{x}</b><br>$%{y:,.0f}<extra></extra>",
-    ))
-    fig_monthly.add_trace(go.Scatter(
-        x=monthly["Month"], y=[avg_monthly] * len(monthly),
-        mode="lines",
-        line=dict(color="#94A3B8", width=1.5, dash="dash"),
-        name="Avg spend",
-        hovertemplate="Avg: $%{y:,.0f}<extra></extra>",
-    ))
-    fig_monthly.update_layout(
-        plot_bgcolor="white", paper_bgcolor="white",
-        height=280, margin=dict(l=0, r=0, t=10, b=0),
-        bargap=0.3,
-        font=dict(family="DM Sans"),
-        xaxis=dict(showgrid=False, tickfont=dict(size=12, color="#64748B", family="DM Sans")),
-        yaxis=dict(showgrid=True, gridcolor="rgba(0,0,0,0.04)",
-                   tickprefix="$", tickformat=",.0f",
-                   tickfont=dict(size=12, color="#64748B", family="DM Sans")),
-        legend=dict(orientation="h", y=1.12, x=1, xanchor="right",
-                    font=dict(size=12, color="#64748B", family="DM Sans")),
-    )
     st.markdown("<div class='section-title'>Monthly Spend</div>", unsafe_allow_html=True)
     st.markdown(
         "<div style='font-family:\"DM Sans\",sans-serif;font-size:12px;color:#94A3B8;margin-bottom:4px;'>"
         "Click a bar to see that month's transactions.</div>",
         unsafe_allow_html=True,
     )
-    monthly_event = st.plotly_chart(fig_monthly, use_container_width=True, on_select="rerun", key="dash_monthly")
-    st.markdown("<div style='margin-bottom:24px;'></div>", unsafe_allow_html=True)
-
-    # ── Monthly drilldown ─────────────────────────────────────────────────────
-    if monthly_event.selection["points"]:
-        sel_label = monthly_event.selection["points"][0].get("x")
-        if sel_label:
-            sel_ym = label_to_ym.get(sel_label, sel_label)
-            df_month_drill = df_exp[df_exp["YearMonth"].astype(str) == sel_ym]
-            if not df_month_drill.empty:
-                render_drilldown(
-                    df_month_drill.sort_values("Amount", ascending=False),
-                    f"{sel_label} — {len(df_month_drill)} transactions",
-                )
+    _monthly_chart(fig_monthly, label_to_ym, df_exp)
 
     # ── Category breakdown ────────────────────────────────────────────────────
-    cat = (
-        df_exp.groupby("Category")["Amount"].sum()
-        .sort_values(ascending=False)
-        .reset_index().rename(columns={"Amount": "Total"})
-    )
-    total_spend = cat["Total"].sum()
-    cat["Pct"] = cat["Total"] / total_spend * 100
-
-    # Per-category trend vs 3-month baseline
-    current_by_cat  = df_exp[df_exp["YearMonth"] == current_period].groupby("Category")["Amount"].sum()
-    baseline_by_cat = (
-        df_exp[df_exp["YearMonth"].isin(last_3)].groupby("Category")["Amount"].sum() / len(last_3)
-        if last_3 else pd.Series(dtype=float)
-    )
+    top_cats, rows_html = _category_breakdown(monthly_cat, start, end, selected_card)
 
     st.markdown("<div class='section-title'>Spending by Category</div>", unsafe_allow_html=True)
-
-    rows_html = ""
-    for i, row in cat.head(10).iterrows():
-        color = CAT_COLORS[i % len(CAT_COLORS)]
-        this_m = current_by_cat.get(row["Category"], 0)
-        base   = baseline_by_cat.get(row["Category"], 0)
-        if base > 0:
-            pct_chg = (this_m - base) / base
-            if pct_chg > 0.10:
-                trend_icon, trend_color, trend_label = "▲", "#DC2626", f"+{pct_chg*100:.0f}%"
-            elif pct_chg < -0.10:
-                trend_icon, trend_color, trend_label = "▼", "#16A34A", f"{pct_chg*100:.0f}%"
-            else:
-                trend_icon, trend_color, trend_label = "→", "#94A3B8", "stable"
-        else:
-            trend_icon, trend_color, trend_label = "◆", "#94A3B8", "new"
-
-        rows_html += f"""
-<div style="display:flex;align-items:center;padding:10px 0;border-bottom:1px solid #F1F5F9;">
-  <div style="width:10px;height:10px;border-radius:50%;background:{color};flex-shrink:0;margin-right:12px;"></div>
-  <div style="flex:1;font-family:'DM Sans',sans-serif;font-size:14px;color:#0F172A;">{row['Category']}</div>
-  <div style="font-family:'DM Sans',sans-serif;font-size:12px;color:#94A3B8;margin-right:20px;width:32px;text-align:right;">{row['Pct']:.0f}%</div>
-  <div style="font-family:'DM Mono',monospace;font-size:15px;color:#0F172A;margin-right:20px;width:72px;text-align:right;">${row['Total']:,.0f}</div>
-  <div style="font-family:'DM Sans',sans-serif;font-size:13px;font-weight:600;color:{trend_color};width:56px;text-align:right;">{trend_icon} {trend_label}</div>
-</div>"""
-
     st.markdown(
         f"<div style='background:white;border-radius:12px;padding:4px 20px 4px;box-shadow:var(--shadow-md);"
         f"border:1px solid rgba(27,58,107,0.07);margin-bottom:16px;'>{rows_html}</div>",
@@ -299,16 +383,7 @@ def dashboard():
     )
 
     # ── Category drilldown ────────────────────────────────────────────────────
-    top_cats = cat.head(10)["Category"].tolist()
-    drill_options = ["— Select a category to drill in —"] + top_cats
-    drill_cat = st.selectbox(
-        "Drill into category", drill_options,
-        label_visibility="collapsed", key="dash_cat_drill",
-    )
-    if drill_cat != "— Select a category to drill in —":
-        df_drill = df_exp[df_exp["Category"] == drill_cat].sort_values("Amount", ascending=False)
-        render_drilldown(df_drill, f"{drill_cat} — {len(df_drill)} transactions")
-
+    _category_drilldown(top_cats, df_exp)
 
 
 # ── Multipage navigation ──────────────────────────────────────────────────────
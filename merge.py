@@ -1,18 +1,28 @@
 """
 merge.py — Run this whenever you add new CSVs to data/.
-Merges all exports, removes duplicate transactions, saves data/merged.csv.
+Merges all exports, removes duplicate transactions, saves data/merged.parquet
+(what the app loads) and data/merged.csv (for spreadsheets).
 """
 
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 from pathlib import Path
 
 DATA_DIR = Path(__file__).parent / "data"
 OUTPUT   = DATA_DIR / "merged.csv"
+OUTPUT_PARQUET = DATA_DIR / "merged.parquet"
 
 # Keep in sync with utils.py CARD_CONFIG (merge.py is standalone, can't import utils).
 CARD_CONFIG = {
     "default": {                        # Chase credit card (standard)
         "date_col":    "Transaction Date",
+        "date_fmt":    "%m/%d/%Y",
         "desc_col":    "Description",
         "cat_col":     "Category",
         "amount_col":  "Amount",
@@ -21,6 +31,7 @@ CARD_CONFIG = {
     },
     "checking": {                       # Chase checking — matches any filename containing "checking"
         "date_col":    "Posting Date",
+        "date_fmt":    "%m/%d/%Y",
         "desc_col":    "Description",
         "cat_col":     None,
         "amount_col":  "Amount",
@@ -49,47 +60,70 @@ def _get_config(card_key: str) -> dict:
 
 
 def _load_checking(raw: pd.DataFrame, card_name: str, cfg: dict) -> pd.DataFrame:
+    """Parse a Chase checking CSV into income + expense rows."""
     details_col = cfg.get("details_col", "Details")
-    rows = []
-    for _, r in raw.iterrows():
-        desc       = str(r[cfg["desc_col"]]).strip()
-        amount_raw = float(r[cfg["amount_col"]])
-        details    = str(r.get(details_col, "")).strip().title()
-        is_credit  = details == "Credit" or amount_raw > 0
-
-        if not is_credit and any(kw in desc.lower() for kw in CC_PAYMENT_KEYWORDS):
-            continue
-
-        desc_lower = desc.lower()
-        is_transfer = any(kw in desc_lower for kw in TRANSFER_KEYWORDS)
-        if is_transfer:
-            record_type = "transfer"
-            category    = "Transfer"
-        elif is_credit:
-            record_type = "income"
-            category    = "Income"
-        else:
-            record_type = "expense"
-            category    = "Uncategorized"
-
-        rows.append({
-            "Date":        pd.to_datetime(r[cfg["date_col"]]),
-            "Description": desc,
-            "Category":    category,
-            "Amount":      abs(amount_raw),
-            "Card":        card_name,
-            "RecordType":  record_type,
-        })
-
-    if not rows:
-        return pd.DataFrame(columns=["Date", "Description", "Category", "Amount", "Card", "RecordType"])
-    return pd.DataFrame(rows)
+    desc        = raw[cfg["desc_col"]].astype(str).str.strip()
+    desc_lower  = desc.str.lower()
+    amount_raw  = raw[cfg["amount_col"]].astype(float)
+    details     = (  # "Credit" or "Debit"
+        raw[details_col].astype(str).str.strip().str.title()
+        if details_col in raw.columns else pd.Series("", index=raw.index)
+    )
+    is_credit   = ((details == "Credit") | (amount_raw > 0)).to_numpy()
+
+    # One regex sweep per keyword list instead of a Python substring test per row/keyword
+    is_cc_payment = desc_lower.str.contains("|".join(map(re.escape, CC_PAYMENT_KEYWORDS)), na=False).to_numpy()
+    is_transfer   = desc_lower.str.contains("|".join(map(re.escape, TRANSFER_KEYWORDS)), na=False).to_numpy()
+
+    keep = is_credit | ~is_cc_payment   # CC payments out of checking are already counted in the card CSV
+    if not keep.any():
+        # Typed like a non-empty result so pd.concat keeps Date/Amount blocks as-is
+        # instead of upcasting every card's columns to object.
+        return pd.DataFrame(columns=["Date", "Description", "Category", "Amount", "Card", "RecordType"]).astype(
+            {"Date": "datetime64[us]", "Amount": "float64"}
+        )
+
+    is_transfer, is_credit = is_transfer[keep], is_credit[keep]
+    return pd.DataFrame({
+        "Date":        pd.to_datetime(raw.loc[keep, cfg["date_col"]]).to_numpy(),
+        "Description": desc[keep].to_numpy(),
+        "Category":    np.select([is_transfer, is_credit], ["Transfer", "Income"], "Uncategorized"),
+        "Amount":      amount_raw[keep].abs().to_numpy(),
+        "Card":        card_name,
+        "RecordType":  np.select([is_transfer, is_credit], ["transfer", "income"], "expense"),
+    })
+
+
+def _read_export(path: Path, cfg: dict) -> pd.DataFrame:
+    """Read a bank CSV with PyArrow's multi-threaded parser, dates and amounts typed up front.
+
+    Chase checking exports end every data row with an extra trailing comma, which
+    Arrow rejects as a column-count mismatch; those (and any other file Arrow can't
+    parse) go through pandas with index_col=False instead.
+    """
+    convert = pacsv.ConvertOptions(
+        column_types={cfg["date_col"]: pa.timestamp("us"), cfg["amount_col"]: pa.float64()},
+        timestamp_parsers=[cfg["date_fmt"], pacsv.ISO8601],
+    )
+    try:
+        # self_destruct frees each Arrow column as it is converted, so the table
+        # and the DataFrame are never both fully resident.
+        return pacsv.read_csv(path, convert_options=convert).to_pandas(
+            split_blocks=True, self_destruct=True
+        )
+    except pa.ArrowInvalid:
+        # date_format keeps the parse on the strptime fast path; a file in some
+        # other format is left as strings for pd.to_datetime to infer.
+        return pd.read_csv(
+            path, index_col=False,
+            parse_dates=[cfg["date_col"]], date_format=cfg["date_fmt"],
+        )
 
 
 def load_card(path: Path) -> pd.DataFrame:
     card_key = path.stem.lower()
     cfg = _get_config(card_key)
-    raw = pd.read_csv(path, index_col=False)
+    raw = _read_export(path, cfg)
     raw.columns = raw.columns.str.strip()
 
     if cfg.get("is_checking"):
@@ -106,7 +140,7 @@ def load_card(path: Path) -> pd.DataFrame:
     df["Amount"]      = raw[cfg["amount_col"]] * cfg["amount_sign"]
     df["Card"]        = path.stem.title()
     df["RecordType"]  = "expense"
-    df = df[df["Amount"] > 0].copy()
+    df = df[df["Amount"] > 0]
     return df
 
 
@@ -126,33 +160,44 @@ def main():
         kind = "checking" if cfg.get("is_checking") else "credit card"
         print(f"  {p.name}  ({kind})")
 
-    frames = []
-    for p in csvs:
-        frame = load_card(p)
-        frame["_source"] = p.name
-        frames.append(frame)
+    # Files are independent and Arrow's parser releases the GIL, so parse them
+    # side by side; map() keeps results in csvs order.
+    with ThreadPoolExecutor() as pool:
+        frames = list(pool.map(load_card, csvs))
+    for p, frame in zip(csvs, frames):
         print(f"  Loaded {len(frame):,} rows from {p.name}")
 
+    source   = np.repeat(np.arange(len(frames)), [len(f) for f in frames])
     combined = pd.concat(frames, ignore_index=True)
+    del frames  # the per-file frames are dead weight once concatenated
 
-    combined["_seq"] = combined.groupby(
-        ["_source", "Date", "Description", "Amount", "Card", "RecordType"]
-    ).cumcount()
+    # Hash the identity columns once into an integer key; the per-file sequence
+    # number and the dedup itself then only ever look at integers.
+    key = combined.groupby(
+        ["Date", "Description", "Amount", "Card", "RecordType"], sort=False, dropna=False
+    ).ngroup().to_numpy()
+    seq = pd.Series(key).groupby([source, key], sort=False).cumcount().to_numpy()
 
     before = len(combined)
-    combined = combined.drop_duplicates(
-        subset=["Date", "Description", "Amount", "Card", "RecordType", "_seq"]
-    )
+    combined = combined[~pd.DataFrame({"key": key, "seq": seq}).duplicated().to_numpy()]
     after = len(combined)
 
-    combined = combined.drop(columns=["_source", "_seq"])
     combined = combined.sort_values(["Card", "Date"]).reset_index(drop=True)
-    combined.to_csv(OUTPUT, index=False)
+    # Convert to Arrow once and serialize both outputs from that table; Arrow's
+    # CSV writer is multi-threaded. Date-only timestamps are written as plain
+    # dates, as to_csv did, so the CSV stays spreadsheet-friendly.
+    table = pa.Table.from_pandas(combined, preserve_index=False)
+    csv_table = table
+    if (combined["Date"] == combined["Date"].dt.normalize()).all():
+        date_idx  = table.schema.get_field_index("Date")
+        csv_table = table.set_column(date_idx, "Date", table["Date"].cast(pa.date32()))
+    pacsv.write_csv(csv_table, OUTPUT)
+    pq.write_table(table, OUTPUT_PARQUET, compression="zstd")
 
     print(f"\nTransactions before dedup: {before:,}")
     print(f"Duplicates removed:        {before - after:,}")
     print(f"Final transaction count:   {after:,}")
-    print(f"Saved to: {OUTPUT}")
+    print(f"Saved to: {OUTPUT_PARQUET} (+ {OUTPUT.name})")
 
 
 if __name__ == "__main__":
@@ -13,6 +13,22 @@ from utils import (
 
 inject_global_css()
 
+
+@st.cache_data(show_spinner=False)
+def _format_cfg(cfg):
+    """cfg with its dollar columns formatted for the contributions table.
+
+    Keyed on the (small) config frame itself, so edits to finance_config.csv
+    still show up while form interactions reuse the formatted copy.
+    """
+    money = "${:,.0f}".format
+    return cfg.assign(**{
+        "Annual (You)":      cfg["AmountPerYear"].map(money),
+        "Annual (Employer)": cfg["EmployerMatch"].map(money).where(cfg["EmployerMatch"].astype(float) > 0, "—"),
+        "Monthly (Est.)":    (cfg["AmountPerYear"] / 12).map(money),
+    })
+
+
 # ── Nav bar ───────────────────────────────────────────────────────────────────
 nav_l, nav_r = st.columns([6, 1])
 with nav_l:
@@ -51,12 +67,7 @@ if cfg.empty:
         unsafe_allow_html=True,
     )
 else:
-    display = cfg.copy()
-    display["Annual (You)"]      = display["AmountPerYear"].apply(lambda x: f"${x:,.0f}")
-    display["Annual (Employer)"] = display["EmployerMatch"].apply(
-        lambda x: f"${x:,.0f}" if float(x) > 0 else "—"
-    )
-    display["Monthly (Est.)"] = (display["AmountPerYear"] / 12).apply(lambda x: f"${x:,.0f}")
+    display = _format_cfg(cfg)
 
     event_cfg = st.dataframe(
         display[["Name", "Type", "Annual (You)", "Annual (Employer)", "Monthly (Est.)", "Notes"]],
@@ -2,126 +2,141 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import streamlit as st
 
-from utils import ACCENT, CAT_COLORS, chart_layout, date_filter, inject_global_css, load_all, render_drilldown, render_nav_bar, render_stat_card
+from utils import ACCENT, CAT_COLORS, chart_layout, date_filter, filtered_expenses, inject_global_css, load_filter_options, render_drilldown, render_nav_bar, render_stat_card
 
 inject_global_css()
 render_nav_bar()
 
+
+@st.cache_data(show_spinner=False)
+def _category_bar(_cat_full, start, end, card, other_threshold) -> dict:
+    """Spend-by-category bar chart as a figure dict.
+
+    cat_full is fully determined by the key, so reruns from bar/row clicks reuse
+    the built figure instead of re-running Plotly Express and its validation.
+    """
+    fig = px.bar(
+        _cat_full, x="Total", y="Category", orientation="h",
+        labels={"Total": "Spend ($)", "Category": ""},
+        color="Category",
+        color_discrete_sequence=CAT_COLORS,
+    )
+    fig.update_layout(
+        **chart_layout(),
+        yaxis={"categoryorder": "total ascending"},
+        xaxis_tickprefix="$", xaxis_tickformat=",.0f",
+        showlegend=False,
+    )
+    fig.update_traces(
+        hovertemplate="<b>%{y}</b><br>$%{x:,.2f}<extra></extra>"
+    )
+    return fig.to_dict()
+
+
+@st.fragment
+def _breakdown(df, start, end, card) -> None:
+    """Aggregation, chart, table and drilldown below the filters.
+
+    A fragment, so the 'Other' slider and bar/row clicks rerun only this block.
+    """
+    # ── Category aggregation ──────────────────────────────────────────────────
+    other_threshold = st.slider("Group categories below this % into 'Other'", 0, 10, 1)
+
+    # One groupby, then plain arrays: the 'Other' fold is a boolean mask on the
+    # sorted totals rather than a second frame concatenated and re-sorted.
+    by_cat  = df.groupby("Category", observed=True, sort=False)["Amount"].agg(["sum", "count"])
+    names   = by_cat.index.to_numpy(dtype=object)
+    totals  = by_cat["sum"].to_numpy()
+    counts  = by_cat["count"].to_numpy()
+    total_spend = totals.sum()
+    pct = np.round(totals / total_spend * 100, 1)
+
+    small = pct < other_threshold
+    if small.any() and other_threshold > 0:
+        names  = np.append(names[~small], "Other")
+        totals = np.append(totals[~small], totals[small].sum())
+        counts = np.append(counts[~small], counts[small].sum())
+        pct    = np.append(pct[~small], round(pct[small].sum(), 1))
+
+    order = np.argsort(-totals, kind="stable")
+    cat_full = pd.DataFrame({
+        "Category":     names[order],
+        "Total":        totals[order],
+        "Transactions": counts[order],
+        "% of Spend":   pct[order],
+        "Avg per Txn":  np.round(totals[order] / counts[order], 2),
+    })
+
+    # ── Summary metrics ────────────────────────────────────────────────────────
+    m1, m2, m3 = st.columns(3)
+    m1.markdown(render_stat_card("Total Spend",  f"${total_spend:,.2f}"),               unsafe_allow_html=True)
+    m2.markdown(render_stat_card("Categories",   str(len(cat_full))),                   unsafe_allow_html=True)
+    m3.markdown(render_stat_card("Avg per Txn",  f"${cat_full['Avg per Txn'].mean():,.2f}"), unsafe_allow_html=True)
+
+    # ── Horizontal bar chart ───────────────────────────────────────────────────
+    fig = _category_bar(cat_full, start, end, card, other_threshold)
+    st.markdown(
+        "<div style='font-family:\"DM Sans\",sans-serif;font-size:12px;color:#94A3B8;"
+        "margin-bottom:4px;'>Click a bar to drill into transactions for that category.</div>",
+        unsafe_allow_html=True,
+    )
+    chart_event = st.plotly_chart(fig, use_container_width=True, on_select="rerun", key="cat_bar")
+
+    # ── Breakdown table ────────────────────────────────────────────────────────
+    st.markdown("<div class='section-title'>Breakdown</div>", unsafe_allow_html=True)
+    st.markdown(
+        "<div style='font-family:\"DM Sans\",sans-serif;font-size:12px;color:#94A3B8;margin-bottom:6px;'>"
+        "Click a column header to sort. Click a row to drill into that category's transactions.</div>",
+        unsafe_allow_html=True,
+    )
+    table_event = st.dataframe(
+        cat_full[["Category", "Total", "% of Spend", "Transactions", "Avg per Txn"]],
+        on_select="rerun",
+        selection_mode="single-row",
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Total":        st.column_config.NumberColumn("Total",      format="$%.2f"),
+            "% of Spend":   st.column_config.ProgressColumn("% of Spend", min_value=0, max_value=100, format="%.1f%%"),
+            "Avg per Txn":  st.column_config.NumberColumn("Avg / Txn", format="$%.2f"),
+            "Transactions": st.column_config.NumberColumn("Txns"),
+        },
+        key="cat_table",
+    )
+
+    # ── Category drilldown ────────────────────────────────────────────────────
+    # Table row click takes priority; chart bar click is the fallback.
+    selected_cat = None
+    if table_event.selection["rows"]:
+        selected_cat = cat_full.iloc[table_event.selection["rows"][0]]["Category"]
+    elif chart_event.selection["points"]:
+        selected_cat = chart_event.selection["points"][0].get("y")
+
+    if selected_cat and selected_cat != "Other":
+        df_drill = df[df["Category"] == selected_cat].sort_values("Amount", ascending=False)
+        render_drilldown(df_drill, f"{selected_cat} — {len(df_drill)} transactions")
+
+
 # ── Load data (always fresh — @st.cache_data handles perf) ───────────────────
-df_all = load_all()
-if df_all.empty:
+if not load_filter_options()["n_rows"]:
     st.error("No data found. Return to the main page or drop CSVs into `data/`.")
     st.stop()
 
 st.markdown("<div class='section-title'>Categories</div>", unsafe_allow_html=True)
 
 # ── Filters ───────────────────────────────────────────────────────────────────
-start, end, selected_card = date_filter(df_all, key="cat")
+start, end, selected_card = date_filter(key="cat")
 st.markdown("<div style='margin-bottom:8px;'></div>", unsafe_allow_html=True)
 
 # ── Apply filters ─────────────────────────────────────────────────────────────
-df = df_all.copy()
-df = df[df["RecordType"] == "expense"]
-df = df[(df["Date"].dt.date >= start) & (df["Date"].dt.date <= end)]
-if selected_card != "All cards":
-    df = df[df["Card"] == selected_card]
+df = filtered_expenses(start, end, selected_card)
 if df.empty:
     st.warning("No transactions match the current filters.")
     st.stop()
 
-# ── Category aggregation ──────────────────────────────────────────────────────
-other_threshold = st.slider("Group categories below this % into 'Other'", 0, 10, 1)
-
-cat_full = (
-    df.groupby("Category")["Amount"]
-    .agg(["sum", "count"])
-    .rename(columns={"sum": "Total", "count": "Transactions"})
-    .sort_values("Total", ascending=False)
-    .reset_index()
-)
-total_spend = cat_full["Total"].sum()
-cat_full["% of Spend"] = (cat_full["Total"] / total_spend * 100).round(1)
-cat_full["Avg per Txn"] = (cat_full["Total"] / cat_full["Transactions"]).round(2)
-
-small = cat_full[cat_full["% of Spend"] < other_threshold]
-if not small.empty and other_threshold > 0:
-    other_row = pd.DataFrame([{
-        "Category": "Other",
-        "Total": small["Total"].sum(),
-        "Transactions": small["Transactions"].sum(),
-        "% of Spend": round(small["% of Spend"].sum(), 1),
-        "Avg per Txn": round(small["Total"].sum() / small["Transactions"].sum(), 2),
-    }])
-    cat_full = (
-        pd.concat([cat_full[cat_full["% of Spend"] >= other_threshold], other_row],
-                  ignore_index=True)
-        .sort_values("Total", ascending=False)
-        .reset_index(drop=True)
-    )
-
-# ── Summary metrics ────────────────────────────────────────────────────────────
-m1, m2, m3 = st.columns(3)
-m1.markdown(render_stat_card("Total Spend",  f"${total_spend:,.2f}"),               unsafe_allow_html=True)
-m2.markdown(render_stat_card("Categories",   str(len(cat_full))),                   unsafe_allow_html=True)
-m3.markdown(render_stat_card("Avg per Txn",  f"${cat_full['Avg per Txn'].mean():,.2f}"), unsafe_allow_html=True)
-
-# ── Horizontal bar chart ───────────────────────────────────────────────────────
-fig = px.bar(
-    cat_full, x="Total", y="Category", orientation="h",
-    labels={"Total": "Spend ($)", "Category": ""},
-    color="Category",
-    color_discrete_sequence=CAT_COLORS,
-)
-fig.update_layout(
-    **chart_layout(),
-    yaxis={"categoryorder": "total ascending"},
-    xaxis_tickprefix="$", xaxis_tickformat=",.0f",
-    showlegend=False,
-)
-fig.update_traces(
-    hovertemplate="<b>%{y}</b><br>$%{x:,.2f}<extra></extra>"
-)
-st.markdown(
-    "<div style='font-family:\"DM Sans\",sans-serif;font-size:12px;color:#94A3B8;"
-    "margin-bottom:4px;'>Click a bar to drill into transactions for that category.</div>",
-    unsafe_allow_html=True,
-)
-chart_event = st.plotly_chart(fig, use_container_width=True, on_select="rerun", key="cat_bar")
-
-# ── Breakdown table ────────────────────────────────────────────────────────────
-st.markdown("<div class='section-title'>Breakdown</div>", unsafe_allow_html=True)
-st.markdown(
-    "<div style='font-family:\"DM Sans\",sans-serif;font-size:12px;color:#94A3B8;margin-bottom:6px;'>"
-    "Click a column header to sort. Click a row to drill into that category's transactions.</div>",
-    unsafe_allow_html=True,
-)
-table_event = st.dataframe(
-    cat_full[["Category", "Total", "% of Spend", "Transactions", "Avg per Txn"]],
-    on_select="rerun",
-    selection_mode="single-row",
-    use_container_width=True,
-    hide_index=True,
-    column_config={
-        "Total":        st.column_config.NumberColumn("Total",      format="$%.2f"),
-        "% of Spend":   st.column_config.ProgressColumn("% of Spend", min_value=0, max_value=100, format="%.1f%%"),
-        "Avg per Txn":  st.column_config.NumberColumn("Avg / Txn", format="$%.2f"),
-        "Transactions": st.column_config.NumberColumn("Txns"),
-    },
-    key="cat_table",
-)
-
-# ── Category drilldown ────────────────────────────────────────────────────────
-# Table row click takes priority; chart bar click is the fallback.
-selected_cat = None
-if table_event.selection["rows"]:
-    selected_cat = cat_full.iloc[table_event.selection["rows"][0]]["Category"]
-elif chart_event.selection["points"]:
-    selected_cat = chart_event.selection["points"][0].get("y")
-
-if selected_cat and selected_cat != "Other":
-    df_drill = df[df["Category"] == selected_cat].sort_values("Amount", ascending=False)
-    render_drilldown(df_drill, f"{selected_cat} — {len(df_drill)} transactions")
+_breakdown(df, start, end, selected_card)
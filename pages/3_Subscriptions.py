@@ -4,35 +4,88 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import streamlit as st
 
-from utils import date_filter, detect_subscriptions, inject_global_css, load_all, render_nav_bar
+from utils import date_filter, detect_subscriptions, filtered_expenses, inject_global_css, load_filter_options, render_nav_bar
 
 inject_global_css()
 render_nav_bar()
 
+
+# ── Subscription table markup ─────────────────────────────────────────────────
+CADENCE_COLORS = {"Monthly": "#2563EB", "Annual": "#8B5CF6", "Quarterly": "#0EA5E9", "Weekly": "#F59E0B"}
+
+ROW_TPL = """
+<tr style="border-bottom:1px solid #F1F5F9;">
+  <td style="padding:12px 16px;font-family:'DM Sans',sans-serif;font-size:14px;color:#0F172A;font-weight:500;">{0}</td>
+  <td style="padding:12px 16px;">
+    <span style="font-family:'DM Sans',sans-serif;font-size:11px;font-weight:600;color:{1};
+    background:{1}18;padding:2px 8px;border-radius:99px;">{2}</span>
+  </td>
+  <td style="padding:12px 16px;font-family:'DM Mono',monospace;font-size:14px;color:#0F172A;text-align:right;">${3:,.2f}</td>
+  <td style="padding:12px 16px;font-family:'DM Mono',monospace;font-size:14px;color:#0F172A;text-align:right;">${4:,.2f}</td>
+  <td style="padding:12px 16px;font-family:'DM Mono',monospace;font-size:14px;font-weight:600;color:#1B3A6B;text-align:right;">${5:,.0f}</td>
+  <td style="padding:12px 16px;font-family:'DM Sans',sans-serif;font-size:13px;color:#475569;text-align:right;">{6}×</td>
+  <td style="padding:12px 16px;font-family:'DM Sans',sans-serif;font-size:13px;color:#475569;">{7}</td>
+</tr>"""
+
+
+@st.cache_data(show_spinner=False)
+def _subscriptions(_df, start, end, card):
+    """detect_subscriptions() for the filtered frame, cached per filter selection.
+
+    _df is fully determined by (start, end, card), so table sorts and other
+    reruns reuse the detected list instead of re-scanning every merchant.
+    """
+    return detect_subscriptions(_df)
+
+
+@st.cache_data(show_spinner=False)
+def _subscription_rows(_subs, start, end, card) -> str:
+    """<tbody> markup for the subscription table, cached per filter selection.
+
+    _subs comes from _subscriptions() under the same key, so reruns reuse the
+    rendered rows instead of formatting every subscription again.
+    """
+    # Columns pulled out once and zipped; each row is a single template format.
+    # detect_subscriptions() already returns rows by Est Monthly Cost, descending.
+    colors = _subs["Cadence"].map(CADENCE_COLORS).fillna("#64748B")
+    rows_html = "".join(
+        ROW_TPL.format(merchant, color, cadence, avg_charge, monthly, monthly * 12, int(n), last_seen)
+        for merchant, color, cadence, avg_charge, monthly, n, last_seen in zip(
+            _subs["Merchant"], colors, _subs["Cadence"], _subs["Avg Charge"],
+            _subs["Est Monthly Cost"], _subs["Occurrences"], _subs["Last Seen"],
+        )
+    )
+
+    annual_total = _subs["Est Monthly Cost"].sum() * 12
+    rows_html += f"""
+<tr style="background:#F8FAFC;">
+  <td colspan="4" style="padding:10px 16px;font-family:'DM Sans',sans-serif;font-size:12px;font-weight:600;
+  color:#475569;text-transform:uppercase;letter-spacing:0.06em;text-align:right;">Total Est. Annual</td>
+  <td style="padding:10px 16px;font-family:'DM Mono',monospace;font-size:15px;font-weight:600;color:#1B3A6B;text-align:right;">${annual_total:,.0f}</td>
+  <td colspan="2"></td>
+</tr>"""
+    return rows_html
+
+
 # ── Load data (always fresh — @st.cache_data handles perf) ───────────────────
-df_all = load_all()
-if df_all.empty:
+if not load_filter_options()["n_rows"]:
     st.error("No data found. Return to the main page or drop CSVs into `data/`.")
     st.stop()
 
 st.markdown("<div class='section-title'>Subscriptions</div>", unsafe_allow_html=True)
 
 # ── Filters ───────────────────────────────────────────────────────────────────
-start, end, selected_card = date_filter(df_all, key="subs", default_preset="All time")
+start, end, selected_card = date_filter(key="subs", default_preset="All time")
 st.markdown("<div style='margin-bottom:8px;'></div>", unsafe_allow_html=True)
 
 # ── Apply filters ─────────────────────────────────────────────────────────────
-df = df_all.copy()
-df = df[df["RecordType"] == "expense"]
-df = df[(df["Date"].dt.date >= start) & (df["Date"].dt.date <= end)]
-if selected_card != "All cards":
-    df = df[df["Card"] == selected_card]
+df = filtered_expenses(start, end, selected_card)
 if df.empty:
     st.warning("No transactions match the current filters.")
     st.stop()
 
 # ── Subscriptions ─────────────────────────────────────────────────────────────
-subs = detect_subscriptions(df)
+subs = _subscriptions(df, start, end, selected_card)
 
 if subs.empty:
     st.info("No subscriptions detected. Works best with 6+ months of data and 'All time' selected.")
@@ -59,39 +112,11 @@ st.markdown(f"""
         <div class="card-sub neutral">subscriptions</div>
     </div>
 </div>
+<div style="margin-bottom:16px;"></div>
 """, unsafe_allow_html=True)
 
-st.markdown("<div style='margin-bottom:16px;'></div>", unsafe_allow_html=True)
-
 # ── Subscription table ────────────────────────────────────────────────────────
-cadence_colors = {"Monthly": "#2563EB", "Annual": "#8B5CF6", "Quarterly": "#0EA5E9", "Weekly": "#F59E0B"}
-
-rows_html = ""
-for _, row in subs.sort_values("Est Monthly Cost", ascending=False).iterrows():
-    color      = cadence_colors.get(row["Cadence"], "#64748B")
-    est_annual = row["Est Monthly Cost"] * 12
-    rows_html += f"""
-<tr style="border-bottom:1px solid #F1F5F9;">
-  <td style="padding:12px 16px;font-family:'DM Sans',sans-serif;font-size:14px;color:#0F172A;font-weight:500;">{row['Merchant']}</td>
-  <td style="padding:12px 16px;">
-    <span style="font-family:'DM Sans',sans-serif;font-size:11px;font-weight:600;color:{color};
-    background:{color}18;padding:2px 8px;border-radius:99px;">{row['Cadence']}</span>
-  </td>
-  <td style="padding:12px 16px;font-family:'DM Mono',monospace;font-size:14px;color:#0F172A;text-align:right;">${row['Avg Charge']:,.2f}</td>
-  <td style="padding:12px 16px;font-family:'DM Mono',monospace;font-size:14px;color:#0F172A;text-align:right;">${row['Est Monthly Cost']:,.2f}</td>
-  <td style="padding:12px 16px;font-family:'DM Mono',monospace;font-size:14px;font-weight:600;color:#1B3A6B;text-align:right;">${est_annual:,.0f}</td>
-  <td style="padding:12px 16px;font-family:'DM Sans',sans-serif;font-size:13px;color:#475569;text-align:right;">{int(row['Occurrences'])}×</td>
-  <td style="padding:12px 16px;font-family:'DM Sans',sans-serif;font-size:13px;color:#475569;">{str(row['Last Seen'])}</td>
-</tr>"""
-
-annual_total = subs["Est Monthly Cost"].sum() * 12
-rows_html += f"""
-<tr style="background:#F8FAFC;">
-  <td colspan="4" style="padding:10px 16px;font-family:'DM Sans',sans-serif;font-size:12px;font-weight:600;
-  color:#475569;text-transform:uppercase;letter-spacing:0.06em;text-align:right;">Total Est. Annual</td>
-  <td style="padding:10px 16px;font-family:'DM Mono',monospace;font-size:15px;font-weight:600;color:#1B3A6B;text-align:right;">${annual_total:,.0f}</td>
-  <td colspan="2"></td>
-</tr>"""
+rows_html = _subscription_rows(subs, start, end, selected_card)
 
 st.markdown(f"""
 <div style="background:white;border-radius:12px;box-shadow:0 2px 8px rgba(27,58,107,0.08);
@@ -111,11 +136,8 @@ border:1px solid rgba(27,58,107,0.07);overflow:hidden;">
     <tbody>{rows_html}</tbody>
   </table>
 </div>
+<div style="font-family:'DM Sans',sans-serif;font-size:12px;color:#64748B;margin-top:10px;">
+  Detected using heuristics: ≥2 charges with consistent amounts at regular intervals.
+  Use <strong>All time</strong> for best results.
+</div>
 """, unsafe_allow_html=True)
-
-st.markdown(
-    f"<div style='font-family:\"DM Sans\",sans-serif;font-size:12px;color:#64748B;margin-top:10px;'>"
-    f"Detected using heuristics: ≥2 charges with consistent amounts at regular intervals. "
-    f"Use <strong>All time</strong> for best results.</div>",
-    unsafe_allow_html=True,
-)
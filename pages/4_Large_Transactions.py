@@ -2,42 +2,48 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import numpy as np
 import plotly.express as px
 import streamlit as st
 
-from utils import CAT_COLORS, chart_layout, date_filter, inject_global_css, load_all, render_nav_bar, render_stat_card
+from utils import CAT_COLORS, chart_layout, date_filter, filtered_expenses, inject_global_css, load_filter_options, render_nav_bar, render_stat_card
 
 inject_global_css()
 render_nav_bar()
 
-# ── Load data ─────────────────────────────────────────────────────────────────
-if "df_all" in st.session_state and not st.session_state["df_all"].empty:
-    df_all = st.session_state["df_all"]
-else:
-    df_all = load_all()
-    if df_all.empty:
-        st.error("No data found. Return to the main page or drop CSVs into `data/`.")
-        st.stop()
+
+@st.cache_data(show_spinner=False)
+def _by_amount(_df, start, end, card):
+    """Filtered expenses sorted by Amount (largest first) plus the slider's p90/p99.
+
+    Keyed on the filter selection only, so moving the threshold slider reuses the
+    sort: the flagged rows are then just a prefix of the sorted frame.
+    """
+    ranked = _df.sort_values("Amount", ascending=False, kind="mergesort").reset_index(drop=True)
+    return ranked, _df["Amount"].quantile(0.90), _df["Amount"].quantile(0.99)
+
+
+# ── Load data (always fresh — @st.cache_data handles perf) ───────────────────
+if not load_filter_options()["n_rows"]:
+    st.error("No data found. Return to the main page or drop CSVs into `data/`.")
+    st.stop()
 
 st.markdown("<div class='section-title'>Large Transactions</div>", unsafe_allow_html=True)
 
 # ── Filters ───────────────────────────────────────────────────────────────────
-start, end, selected_card = date_filter(df_all, key="large")
+start, end, selected_card = date_filter(key="large")
 st.markdown("<div style='margin-bottom:8px;'></div>", unsafe_allow_html=True)
 
 # ── Apply filters ─────────────────────────────────────────────────────────────
-df = df_all.copy()
-df = df[df["RecordType"] == "expense"]
-df = df[(df["Date"].dt.date >= start) & (df["Date"].dt.date <= end)]
-if selected_card != "All cards":
-    df = df[df["Card"] == selected_card]
+df = filtered_expenses(start, end, selected_card)
 if df.empty:
     st.warning("No transactions match the current filters.")
     st.stop()
 
 # ── Large Transactions ────────────────────────────────────────────────────────
-max_amount  = int(df["Amount"].quantile(0.99))
-default_val = max(50, int(df["Amount"].quantile(0.90) / 50) * 50)  # round to nearest $50
+ranked, p90, p99 = _by_amount(df, start, end, selected_card)
+max_amount  = int(p99)
+default_val = max(50, int(p90 / 50) * 50)  # round to nearest $50
 
 threshold = st.slider(
     "Minimum transaction amount",
@@ -47,11 +53,9 @@ threshold = st.slider(
     step=50,
     format="$%d",
 )
-large = (
-    df[df["Amount"] >= threshold]
-    .sort_values("Amount", ascending=False)
-    .reset_index(drop=True)
-)
+# Amounts descend, so every row at or above the threshold sits at the front
+n_large = np.searchsorted(-ranked["Amount"].to_numpy(), -threshold, side="right")
+large   = ranked.iloc[:n_large]
 
 c1, c2, c3 = st.columns(3)
 c1.markdown(render_stat_card("Min Threshold",        f"${threshold:,.0f}"),             unsafe_allow_html=True)
@@ -63,6 +67,7 @@ fig7 = px.scatter(
     hover_data={"Description": True, "Card": True},
     labels={"Amount": "Amount ($)"},
     color_discrete_sequence=CAT_COLORS,
+    render_mode="webgl",
 )
 fig7.update_layout(**chart_layout(), yaxis_tickprefix="$", yaxis_tickformat=",.0f")
 fig7.update_traces(marker=dict(size=10, opacity=0.8))
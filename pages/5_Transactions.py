@@ -1,10 +1,12 @@
+import math
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import numpy as np
 import streamlit as st
 
-from utils import CAT_COLORS, TRANSFER_KEYWORDS, date_filter, inject_global_css, load_all
+from utils import date_filter, inject_global_css, load_all, load_filter_options, slice_date_range, transfer_keyword_chips
 
 inject_global_css()
 
@@ -29,14 +31,15 @@ if df_all.empty:
 st.markdown("<div class='section-title'>Transactions</div>", unsafe_allow_html=True)
 
 # ── Date + card filter ────────────────────────────────────────────────────────
-start, end, selected_card = date_filter(df_all, key="txn")
+start, end, selected_card = date_filter(key="txn")
+filter_options = load_filter_options()
 
 # ── Additional filters row ────────────────────────────────────────────────────
 f1, f2, f3, f4 = st.columns([2.5, 1.5, 1.2, 1.2])
 with f1:
     search = st.text_input("Search", placeholder="Search merchant or category…", label_visibility="collapsed")
 with f2:
-    all_cats = ["All categories"] + sorted(df_all["Category"].unique().tolist())
+    all_cats = ["All categories"] + filter_options["categories"]
     selected_cat = st.selectbox("Category", all_cats, label_visibility="collapsed")
 with f3:
     record_type = st.selectbox(
@@ -65,22 +68,23 @@ with a2:
 st.markdown("<div style='margin-bottom:8px;'></div>", unsafe_allow_html=True)
 
 # ── Apply filters ─────────────────────────────────────────────────────────────
-df = df_all.copy()
-df = df[(df["Date"].dt.date >= start) & (df["Date"].dt.date <= end)]
+# Every filter ANDs into one mask over the date slice, so the frame is copied once
+df = slice_date_range(df_all, start, end)
+amounts = df["Amount"].to_numpy()
+mask = (amounts >= amt_min) & (amounts <= amt_max)
 if selected_card != "All cards":
-    df = df[df["Card"] == selected_card]
-if search:
-    mask = (
-        df["Description"].str.contains(search, case=False, na=False) |
-        df["Category"].str.contains(search, case=False, na=False)
-    )
-    df = df[mask]
+    mask &= (df["Card"] == selected_card).to_numpy()
 if selected_cat != "All categories":
-    df = df[df["Category"] == selected_cat]
+    mask &= (df["Category"] == selected_cat).to_numpy()
 type_map = {"Expenses": "expense", "Income": "income", "Transfers": "transfer"}
 if record_type in type_map:
-    df = df[df["RecordType"] == type_map[record_type]]
-df = df[(df["Amount"] >= amt_min) & (df["Amount"] <= amt_max)]
+    mask &= (df["RecordType"] == type_map[record_type]).to_numpy()
+if search:
+    mask &= (
+        df["Description"].str.contains(search, case=False, na=False, regex=False) |
+        df["Category"].str.contains(search, case=False, na=False, regex=False)
+    ).to_numpy()
+df = df[mask]
 
 sort_map = {
     "Date ↓":   ("Date", False),
@@ -98,76 +102,81 @@ total_spend  = df_exp_view["Amount"].sum()
 total_income = df_income_view["Amount"].sum()
 count        = len(df)
 
+# One grid in a single st.markdown instead of a markdown call per column + spacer
+stat_tpl = (
+    "<div style='font-family:\"DM Sans\",sans-serif;font-size:13px;color:#64748B;'>"
+    "<span style='font-weight:600;color:{0};font-family:\"DM Mono\",monospace;font-size:18px;'>"
+    "{1}</span>&nbsp; {2}</div>"
+)
 if total_income > 0:
-    m1, m2, m3 = st.columns(3)
-    m1.markdown(
-        f"<div style='font-family:\"DM Sans\",sans-serif;font-size:13px;color:#64748B;'>"
-        f"<span style='font-weight:600;color:#0F172A;font-family:\"DM Mono\",monospace;font-size:18px;'>"
-        f"${total_spend:,.0f}</span>&nbsp; expenses</div>",
-        unsafe_allow_html=True,
-    )
-    m2.markdown(
-        f"<div style='font-family:\"DM Sans\",sans-serif;font-size:13px;color:#64748B;'>"
-        f"<span style='font-weight:600;color:#16A34A;font-family:\"DM Mono\",monospace;font-size:18px;'>"
-        f"+${total_income:,.0f}</span>&nbsp; income</div>",
-        unsafe_allow_html=True,
-    )
-    m3.markdown(
-        f"<div style='font-family:\"DM Sans\",sans-serif;font-size:13px;color:#64748B;'>"
-        f"<span style='font-weight:600;color:#0F172A;font-family:\"DM Mono\",monospace;font-size:18px;'>"
-        f"{count:,}</span>&nbsp; transactions</div>",
-        unsafe_allow_html=True,
-    )
+    stats = [
+        ("#0F172A", f"${total_spend:,.0f}",   "expenses"),
+        ("#16A34A", f"+${total_income:,.0f}", "income"),
+        ("#0F172A", f"{count:,}",             "transactions"),
+    ]
 else:
-    m1, m2 = st.columns(2)
-    m1.markdown(
-        f"<div style='font-family:\"DM Sans\",sans-serif;font-size:13px;color:#64748B;'>"
-        f"<span style='font-weight:600;color:#0F172A;font-family:\"DM Mono\",monospace;font-size:18px;'>"
-        f"${total_spend:,.0f}</span>&nbsp; total spend</div>",
-        unsafe_allow_html=True,
-    )
-    m2.markdown(
-        f"<div style='font-family:\"DM Sans\",sans-serif;font-size:13px;color:#64748B;'>"
-        f"<span style='font-weight:600;color:#0F172A;font-family:\"DM Mono\",monospace;font-size:18px;'>"
-        f"{count:,}</span>&nbsp; transactions</div>",
-        unsafe_allow_html=True,
-    )
-
-st.markdown("<div style='margin-bottom:8px;'></div>", unsafe_allow_html=True)
+    stats = [
+        ("#0F172A", f"${total_spend:,.0f}", "total spend"),
+        ("#0F172A", f"{count:,}",           "transactions"),
+    ]
+st.markdown(
+    f"<div style='display:grid;grid-template-columns:repeat({len(stats)},1fr);gap:16px;margin-bottom:8px;'>"
+    + "".join(stat_tpl.format(*stat) for stat in stats)
+    + "</div>",
+    unsafe_allow_html=True,
+)
 
 # ── Transaction table ─────────────────────────────────────────────────────────
-cat_color_map = {
-    cat: CAT_COLORS[i % len(CAT_COLORS)]
-    for i, cat in enumerate(sorted(df_all["Category"].unique().tolist()))
-}
+cat_color_map = filter_options["category_colors"]
 
 if df.empty:
     st.info("No transactions match your filters.")
 else:
-    display = df[["Date", "Description", "Category", "Amount", "Card",
-                  *( ["RecordType"] if "RecordType" in df.columns else [] )]].copy()
+    # Only the current page of rows is turned into HTML, however many rows match
+    p1, p2, _ = st.columns([1, 1, 4])
+    with p1:
+        page_size = st.selectbox("Rows per page", [50, 100, 500], index=1,
+                                 format_func=lambda n: f"{n} per page", label_visibility="collapsed")
+    n_pages = math.ceil(count / page_size)
+    with p2:
+        page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1,
+                               disabled=n_pages == 1, label_visibility="collapsed")
+    first = (min(int(page), n_pages) - 1) * page_size
+    last  = min(first + page_size, count)
+
+    display = df.iloc[first:last][["Date", "Description", "Category", "Amount", "Card",
+                                   *( ["RecordType"] if "RecordType" in df.columns else [] )]]
     display["Date"] = display["Date"].dt.strftime("%b %d, %Y")
 
-    rows_html = ""
-    for _, row in display.iterrows():
-        cat        = row["Category"]
-        color      = cat_color_map.get(cat, "#94A3B8")
-        is_income  = row.get("RecordType", "expense") == "income"
-        amt_str    = f"+${row['Amount']:,.2f}" if is_income else f"${row['Amount']:,.2f}"
-        amt_color  = "#16A34A" if is_income else "#0F172A"
-        row_bg     = "background:#F0FDF4;" if is_income else ""
-        rows_html += f"""
-<tr style="border-bottom:1px solid #F1F5F9;{row_bg}">
-  <td style="padding:10px 12px;font-family:'DM Sans',sans-serif;font-size:13px;color:#64748B;white-space:nowrap;">{row['Date']}</td>
-  <td style="padding:10px 12px;font-family:'DM Sans',sans-serif;font-size:13px;color:#0F172A;max-width:280px;overflow:hidden;text-overflow:ellipsis;white-space:nowrap;">{row['Description']}</td>
+    row_tpl = """
+<tr style="border-bottom:1px solid #F1F5F9;{0}">
+  <td style="padding:10px 12px;font-family:'DM Sans',sans-serif;font-size:13px;color:#64748B;white-space:nowrap;">{1}</td>
+  <td style="padding:10px 12px;font-family:'DM Sans',sans-serif;font-size:13px;color:#0F172A;max-width:280px;overflow:hidden;text-overflow:ellipsis;white-space:nowrap;">{2}</td>
   <td style="padding:10px 12px;">
-    <span style="font-family:'DM Sans',sans-serif;font-size:11px;font-weight:600;color:{color};
-    background:{color}18;padding:2px 8px;border-radius:99px;white-space:nowrap;">{cat}</span>
+    <span style="font-family:'DM Sans',sans-serif;font-size:11px;font-weight:600;color:{3};
+    background:{3}18;padding:2px 8px;border-radius:99px;white-space:nowrap;">{4}</span>
   </td>
-  <td style="padding:10px 12px;font-family:'DM Mono',monospace;font-size:13px;color:{amt_color};text-align:right;white-space:nowrap;">{amt_str}</td>
-  <td style="padding:10px 12px;font-family:'DM Sans',sans-serif;font-size:12px;color:#64748B;white-space:nowrap;">{row['Card']}</td>
+  <td style="padding:10px 12px;font-family:'DM Mono',monospace;font-size:13px;color:{5};text-align:right;white-space:nowrap;">{6}${7:,.2f}</td>
+  <td style="padding:10px 12px;font-family:'DM Sans',sans-serif;font-size:12px;color:#64748B;white-space:nowrap;">{8}</td>
 </tr>"""
 
+    # Income styling is picked per column with np.where, then the columns are
+    # zipped so each row is a single template format (no per-row Series).
+    if "RecordType" in display.columns:
+        is_income = (display["RecordType"] == "income").to_numpy()
+    else:
+        is_income = np.zeros(len(display), dtype=bool)
+    row_bg    = np.where(is_income, "background:#F0FDF4;", "")
+    amt_color = np.where(is_income, "#16A34A", "#0F172A")
+    amt_sign  = np.where(is_income, "+", "")
+    rows_html = "".join(
+        row_tpl.format(bg, date, desc, cat_color_map.get(cat, "#94A3B8"), cat, color, sign, amount, card)
+        for bg, date, desc, cat, color, sign, amount, card in zip(
+            row_bg, display["Date"], display["Description"], display["Category"],
+            amt_color, amt_sign, display["Amount"], display["Card"],
+        )
+    )
+
     st.markdown(f"""
 <div style="background:white;border-radius:12px;box-shadow:0 2px 8px rgba(27,58,107,0.08);
 border:1px solid rgba(27,58,107,0.07);overflow:hidden;overflow-x:auto;">
@@ -185,7 +194,7 @@ border:1px solid rgba(27,58,107,0.07);overflow:hidden;overflow-x:auto;">
   </table>
 </div>
 <div style="font-family:'DM Sans',sans-serif;font-size:12px;color:#64748B;margin-top:8px;text-align:right;">
-  Showing {count:,} transactions
+  Showing {first + 1:,}–{last:,} of {count:,} transactions
 </div>
 """, unsafe_allow_html=True)
 
@@ -200,19 +209,19 @@ with st.expander(f"Excluded transfers ({len(transfers):,} transactions hidden fr
         "For a full breakdown of transfer activity, see <strong>Explore → Transfers</strong>.</div>",
         unsafe_allow_html=True,
     )
-    kw_html = " ".join(
-        f"<span style='font-family:\"DM Mono\",monospace;font-size:12px;background:#F1F5F9;"
-        f"color:#1B3A6B;padding:3px 10px;border-radius:99px;border:1px solid #E2E8F0;"
-        f"display:inline-block;margin:3px 2px;'>{kw}</span>"
-        for kw in sorted(TRANSFER_KEYWORDS)
-    )
-    st.markdown(f"<div style='margin-bottom:16px;'>{kw_html}</div>", unsafe_allow_html=True)
+    st.markdown(f"<div style='margin-bottom:16px;'>{transfer_keyword_chips()}</div>", unsafe_allow_html=True)
 
     if not transfers.empty:
         st.markdown("<div class='section-title' style='margin-top:4px;'>Excluded transactions</div>",
                     unsafe_allow_html=True)
-        t_display = transfers[["Date", "Description", "Amount", "Card"]].copy()
-        t_display["Date"]   = t_display["Date"].dt.strftime("%b %d, %Y") if hasattr(t_display["Date"].iloc[0], "strftime") else t_display["Date"]
-        t_display["Amount"] = t_display["Amount"].apply(lambda x: f"${x:,.2f}")
-        t_display = t_display.sort_values("Date", ascending=False).reset_index(drop=True)
-        st.dataframe(t_display, use_container_width=True, hide_index=True)
+        # Raw values go to the grid and are formatted client-side by column_config
+        t_display = transfers[["Date", "Description", "Amount", "Card"]].sort_values("Date", ascending=False)
+        st.dataframe(
+            t_display,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Date":   st.column_config.DateColumn("Date", format="MMM DD, YYYY"),
+                "Amount": st.column_config.NumberColumn("Amount", format="$%.2f"),
+            },
+        )
@@ -1,17 +1,66 @@
 import calendar
+import datetime
+import re
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
 
-from utils import ACCENT, CAT_COLORS, chart_layout, detect_subscriptions, inject_global_css, load_all, render_drilldown, render_nav_bar, render_stat_card
+from utils import ACCENT, CAT_COLORS, chart_layout, detect_subscriptions, inject_global_css, load_all, load_filter_options, month_code, render_drilldown, render_nav_bar, render_stat_card, slice_date_range
 
 inject_global_css()
 render_nav_bar()
 
+
+# Aggregations below are keyed on the (year, card) selection (or just card); the
+# frames they receive are fully determined by it, so drilldown clicks reuse them.
+@st.cache_data(max_entries=32, show_spinner=False)
+def _month_totals(_df_card, year, card) -> np.ndarray:
+    """Expense totals binned into a 24-slot month grid in a single pass.
+
+    Slots 0–11 are Jan–Dec of year - 1, slots 12–23 Jan–Dec of year.
+    """
+    df_card_exp = _df_card[_df_card["RecordType"] == "expense"]
+    slot = df_card_exp["YearMonth"].to_numpy() - month_code(year - 1, 1)
+    in_grid = (slot >= 0) & (slot < 24)
+    return np.bincount(
+        slot[in_grid], weights=df_card_exp["Amount"].to_numpy()[in_grid], minlength=24
+    )
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _card_subscriptions(_df_card, card) -> pd.DataFrame:
+    """detect_subscriptions() over the card's full expense history (not year-scoped)."""
+    return detect_subscriptions(_df_card[_df_card["RecordType"] == "expense"])
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _category_totals(_df_exp, year, card) -> pd.DataFrame:
+    """Category / Total for the year's expenses, largest first."""
+    return (
+        _df_exp.groupby("Category", observed=True, sort=False)["Amount"].sum()
+        .sort_values(ascending=False)
+        .reset_index()
+        .rename(columns={"Amount": "Total"})
+    )
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _top_merchants(_df_exp, year, card, n: int = 10) -> pd.DataFrame:
+    """Merchant / Total for the year's n largest merchants by spend."""
+    return (
+        _df_exp.groupby("Description", observed=True, sort=False)["Amount"].sum()
+        .sort_values(ascending=False)
+        .head(n)
+        .reset_index()
+        .rename(columns={"Description": "Merchant", "Amount": "Total"})
+    )
+
+
 # ── Load data ─────────────────────────────────────────────────────────────────
 df_all = load_all()
 if df_all.empty:
@@ -33,9 +82,10 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ── Year + Card selectors ─────────────────────────────────────────────────────
+filter_options = load_filter_options()
 sel_col, card_col, _ = st.columns([2, 1.5, 4])
 with sel_col:
-    available_years = sorted(df_all["Date"].dt.year.unique(), reverse=True)
+    available_years = filter_options["years"]
     selected_year = st.selectbox(
         "Year",
         available_years,
@@ -44,7 +94,7 @@ with sel_col:
         format_func=lambda y: str(y),
     )
 with card_col:
-    card_options = ["All cards"] + sorted(df_all["Card"].dropna().unique().tolist())
+    card_options = ["All cards"] + filter_options["cards"]
     selected_card = st.selectbox(
         "Card",
         card_options,
@@ -55,13 +105,18 @@ with card_col:
 st.markdown("<div style='margin-bottom:16px;'></div>", unsafe_allow_html=True)
 
 # ── Filter data ───────────────────────────────────────────────────────────────
-df_card = df_all.copy()
+# load_all() is sorted by Date, so the year is a binary-search slice rather than
+# a scan, and one RecordType Categorical splits it into expenses and income.
+# .values keeps the Categorical, so the masks compare codes (.to_numpy() would
+# build an object array and compare strings).
+df_card = df_all
 if selected_card != "All cards":
-    df_card = df_card[df_card["Card"] == selected_card]
+    df_card = df_card[df_card["Card"].values == selected_card]
 
-df_year  = df_card[df_card["Date"].dt.year == selected_year]
-df_exp   = df_year[df_year["RecordType"] == "expense"]
-df_income = df_year[df_year["RecordType"] == "income"]
+df_year  = slice_date_range(df_card, datetime.date(selected_year, 1, 1), datetime.date(selected_year, 12, 31))
+record_type = df_year["RecordType"].values
+df_exp   = df_year[record_type == "expense"]
+df_income = df_year[record_type == "income"]
 has_income = not df_income.empty
 
 if df_exp.empty:
@@ -95,35 +150,16 @@ st.markdown("<div style='margin-bottom:24px;'></div>", unsafe_allow_html=True)
 # ── Month-by-month bar chart ──────────────────────────────────────────────────
 st.markdown("<div class='section-title'>Month-by-Month Spend</div>", unsafe_allow_html=True)
 
-# Build full Jan–Dec grid for selected year
-all_months = [f"{selected_year}-{m:02d}" for m in range(1, 13)]
 month_labels = [calendar.month_abbr[m] for m in range(1, 13)]
 
-monthly_exp = (
-    df_exp.groupby("YearMonth")["Amount"].sum()
-    .reset_index()
-    .rename(columns={"Amount": "Total"})
-)
-monthly_exp["Month"] = monthly_exp["YearMonth"].astype(str)
-month_map = dict(zip(monthly_exp["Month"], monthly_exp["Total"]))
-y_current = [month_map.get(m, 0) for m in all_months]
-
-# Prior year overlay
+# Current and prior year expenses from one 24-slot month grid
 prior_year = selected_year - 1
-df_prior = df_card[df_card["Date"].dt.year == prior_year]
-df_prior_exp = df_prior[df_prior["RecordType"] == "expense"]
-prior_months = [f"{prior_year}-{m:02d}" for m in range(1, 13)]
-prior_exp = (
-    df_prior_exp.groupby("YearMonth")["Amount"].sum()
-    .reset_index()
-    .rename(columns={"Amount": "Total"})
-)
-prior_exp["Month"] = prior_exp["YearMonth"].astype(str)
-prior_map = dict(zip(prior_exp["Month"], prior_exp["Total"]))
-y_prior = [prior_map.get(m, 0) for m in prior_months]
-has_prior = any(v > 0 for v in y_prior)
-
-avg_val = sum(v for v in y_current if v > 0) / max(sum(1 for v in y_current if v > 0), 1)
+month_totals = _month_totals(df_card, selected_year, selected_card)
+has_prior = bool((month_totals[:12] > 0).any())
+active    = month_totals[12:][month_totals[12:] > 0]
+avg_val   = active.mean() if active.size else 0.0
+y_prior   = month_totals[:12].tolist()
+y_current = month_totals[12:].tolist()
 
 fig_monthly = go.Figure()
 
@@ -182,8 +218,7 @@ if monthly_event.selection["points"]:
     if sel_label:
         month_num = list(__import__("calendar").month_abbr).index(sel_label)
         if month_num > 0:
-            sel_ym = f"{selected_year}-{month_num:02d}"
-            df_month_drill = df_exp[df_exp["YearMonth"].astype(str) == sel_ym]
+            df_month_drill = df_exp[df_exp["YearMonth"] == month_code(selected_year, month_num)]
             if not df_month_drill.empty:
                 render_drilldown(
                     df_month_drill.sort_values("Amount", ascending=False),
@@ -193,24 +228,31 @@ if monthly_event.selection["points"]:
 # ── Spend by Category ─────────────────────────────────────────────────────────
 st.markdown("<div class='section-title'>Spend by Category</div>", unsafe_allow_html=True)
 
-cat = (
-    df_exp.groupby("Category")["Amount"].sum()
-    .sort_values(ascending=False)
-    .reset_index()
-    .rename(columns={"Amount": "Total"})
-)
+cat = _category_totals(df_exp, selected_year, selected_card)
 cat["Pct"] = cat["Total"] / total_spend * 100
 
+# Long tails fold into one "Other (n)" bar so the chart stays readable and light
+MAX_CAT_BARS = 15
+other_label  = None
+cat_display  = cat
+if len(cat) > MAX_CAT_BARS + 1:
+    tail_cats   = cat["Category"].iloc[MAX_CAT_BARS:].tolist()
+    other_label = f"Other ({len(tail_cats)})"
+    cat_display = pd.DataFrame({
+        "Category": cat["Category"].iloc[:MAX_CAT_BARS].tolist() + [other_label],
+        "Total":    cat["Total"].iloc[:MAX_CAT_BARS].tolist() + [cat["Total"].iloc[MAX_CAT_BARS:].sum()],
+    })
+
 fig_cat = go.Figure(go.Bar(
-    x=cat["Total"],
-    y=cat["Category"],
+    x=cat_display["Total"],
+    y=cat_display["Category"],
     orientation="h",
-    marker_color=[CAT_COLORS[i % len(CAT_COLORS)] for i in range(len(cat))],
+    marker_color=[CAT_COLORS[i % len(CAT_COLORS)] for i in range(len(cat_display))],
     hovertemplate="<b>%{y}</b><br>$%{x:,.0f}<extra></extra>",
 ))
 fig_cat.update_layout(
     plot_bgcolor="white", paper_bgcolor="white",
-    height=max(200, len(cat) * 32),
+    height=max(200, len(cat_display) * 32),
     margin=dict(l=0, r=0, t=10, b=0),
     xaxis=dict(
         showgrid=True, gridcolor="rgba(0,0,0,0.04)",
@@ -236,23 +278,23 @@ if cat_event.selection["points"]:
     selected_cat = cat_event.selection["points"][0].get("y")
 
 if selected_cat:
-    df_drill = df_exp[df_exp["Category"] == selected_cat].sort_values("Amount", ascending=False)
+    drill_cats = tail_cats if selected_cat == other_label else [selected_cat]
+    df_drill = df_exp[df_exp["Category"].isin(drill_cats)].sort_values("Amount", ascending=False)
     render_drilldown(df_drill, f"{selected_cat} — {selected_year} ({len(df_drill)} transactions)")
 
 # ── Fixed vs Variable ─────────────────────────────────────────────────────────
 st.markdown("<div class='section-title'>Fixed vs Variable</div>", unsafe_allow_html=True)
 
-# Detect subs from full card-filtered history (not year-scoped) for best detection
-subs = detect_subscriptions(df_card[df_card["RecordType"] == "expense"])
+# Detect subs from full card-filtered history (not year-scoped) for best detection;
+# cached per card, so year changes and bar clicks don't re-run detection
+subs = _card_subscriptions(df_card, selected_card)
 
 if not subs.empty:
-    sub_merchants = set(subs["Merchant"].str.lower())
-    df_exp_lower = df_exp.copy()
-    df_exp_lower["_desc_lower"] = df_exp_lower["Description"].str.lower()
-    fixed_mask = df_exp_lower["_desc_lower"].apply(
-        lambda d: any(m in d for m in sub_merchants)
-    )
-    fixed_spend    = df_exp[fixed_mask]["Amount"].sum()
+    # One case-insensitive alternation instead of a Python substring loop per row;
+    # on the categorical Description it only runs once per distinct merchant.
+    sub_pattern = "|".join(map(re.escape, subs["Merchant"].str.lower().unique()))
+    fixed_mask  = df_exp["Description"].str.contains(sub_pattern, case=False, na=False).to_numpy()
+    fixed_spend    = df_exp["Amount"].to_numpy()[fixed_mask].sum()
     variable_spend = total_spend - fixed_spend
 else:
     fixed_spend    = 0.0
@@ -304,31 +346,30 @@ st.markdown("<div style='margin-bottom:24px;'></div>", unsafe_allow_html=True)
 # ── Top Merchants ─────────────────────────────────────────────────────────────
 st.markdown("<div class='section-title'>Top Merchants</div>", unsafe_allow_html=True)
 
-merchants = (
-    df_exp.groupby("Description")["Amount"].sum()
-    .sort_values(ascending=False)
-    .head(10)
-    .reset_index()
-    .rename(columns={"Description": "Merchant", "Amount": "Total"})
-)
+merchants = _top_merchants(df_exp, selected_year, selected_card)
 merchants["Pct"] = merchants["Total"] / total_spend * 100
 
-merch_rows = ""
-for i, row in merchants.iterrows():
-    bar_width = row["Pct"] * 2  # scale: 50% spend → 100px bar
-    merch_rows += f"""
+row_tpl = """
 <tr style="border-bottom:1px solid #F1F5F9;">
-  <td style="padding:10px 16px;font-family:'DM Sans',sans-serif;font-size:13px;color:#64748B;font-weight:600;width:32px;text-align:right;">{i+1}</td>
-  <td style="padding:10px 16px;font-family:'DM Sans',sans-serif;font-size:14px;color:#0F172A;font-weight:500;">{row['Merchant']}</td>
+  <td style="padding:10px 16px;font-family:'DM Sans',sans-serif;font-size:13px;color:#64748B;font-weight:600;width:32px;text-align:right;">{0}</td>
+  <td style="padding:10px 16px;font-family:'DM Sans',sans-serif;font-size:14px;color:#0F172A;font-weight:500;">{1}</td>
   <td style="padding:10px 16px;">
     <div style="display:flex;align-items:center;gap:10px;">
-      <div style="background:{ACCENT};height:6px;border-radius:3px;width:{bar_width:.0f}px;min-width:4px;"></div>
-      <span style="font-family:'DM Sans',sans-serif;font-size:12px;color:#94A3B8;">{row['Pct']:.1f}%</span>
+      <div style="background:{5};height:6px;border-radius:3px;width:{2:.0f}px;min-width:4px;"></div>
+      <span style="font-family:'DM Sans',sans-serif;font-size:12px;color:#94A3B8;">{3:.1f}%</span>
     </div>
   </td>
-  <td style="padding:10px 16px;font-family:'DM Mono',monospace;font-size:14px;color:#0F172A;text-align:right;">${row['Total']:,.0f}</td>
+  <td style="padding:10px 16px;font-family:'DM Mono',monospace;font-size:14px;color:#0F172A;text-align:right;">${4:,.0f}</td>
 </tr>"""
 
+# Bar width scale: 50% of spend → 100px bar
+merch_rows = "".join(
+    row_tpl.format(rank, merchant, pct * 2, pct, total, ACCENT)
+    for rank, merchant, pct, total in zip(
+        range(1, len(merchants) + 1), merchants["Merchant"], merchants["Pct"], merchants["Total"],
+    )
+)
+
 st.markdown(f"""
 <div style="background:white;border-radius:12px;box-shadow:0 2px 8px rgba(27,58,107,0.08);
 border:1px solid rgba(27,58,107,0.07);overflow:hidden;margin-bottom:24px;">
@@ -352,22 +393,27 @@ if not subs.empty:
 
     cadence_colors = {"Monthly": "#2563EB", "Annual": "#8B5CF6", "Quarterly": "#0EA5E9", "Weekly": "#F59E0B"}
 
-    sub_rows = ""
-    for _, row in subs.sort_values("Est Monthly Cost", ascending=False).iterrows():
-        color     = cadence_colors.get(row["Cadence"], "#64748B")
-        est_annual = row["Est Monthly Cost"] * 12
-        sub_rows += f"""
+    sub_row_tpl = """
 <tr style="border-bottom:1px solid #F1F5F9;">
-  <td style="padding:12px 16px;font-family:'DM Sans',sans-serif;font-size:14px;color:#0F172A;font-weight:500;">{row['Merchant']}</td>
+  <td style="padding:12px 16px;font-family:'DM Sans',sans-serif;font-size:14px;color:#0F172A;font-weight:500;">{0}</td>
   <td style="padding:12px 16px;">
-    <span style="font-family:'DM Sans',sans-serif;font-size:11px;font-weight:600;color:{color};
-    background:{color}18;padding:2px 8px;border-radius:99px;">{row['Cadence']}</span>
+    <span style="font-family:'DM Sans',sans-serif;font-size:11px;font-weight:600;color:{1};
+    background:{1}18;padding:2px 8px;border-radius:99px;">{2}</span>
   </td>
-  <td style="padding:12px 16px;font-family:'DM Mono',monospace;font-size:14px;color:#0F172A;text-align:right;">${row['Avg Charge']:,.2f}</td>
-  <td style="padding:12px 16px;font-family:'DM Mono',monospace;font-size:14px;color:#0F172A;text-align:right;">${row['Est Monthly Cost']:,.2f}</td>
-  <td style="padding:12px 16px;font-family:'DM Mono',monospace;font-size:14px;font-weight:600;color:#1B3A6B;text-align:right;">${est_annual:,.0f}</td>
+  <td style="padding:12px 16px;font-family:'DM Mono',monospace;font-size:14px;color:#0F172A;text-align:right;">${3:,.2f}</td>
+  <td style="padding:12px 16px;font-family:'DM Mono',monospace;font-size:14px;color:#0F172A;text-align:right;">${4:,.2f}</td>
+  <td style="padding:12px 16px;font-family:'DM Mono',monospace;font-size:14px;font-weight:600;color:#1B3A6B;text-align:right;">${5:,.0f}</td>
 </tr>"""
 
+    # detect_subscriptions() already returns rows by Est Monthly Cost, descending
+    sub_colors = subs["Cadence"].map(cadence_colors).fillna("#64748B")
+    sub_rows = "".join(
+        sub_row_tpl.format(merchant, color, cadence, avg_charge, monthly, monthly * 12)
+        for merchant, color, cadence, avg_charge, monthly in zip(
+            subs["Merchant"], sub_colors, subs["Cadence"], subs["Avg Charge"], subs["Est Monthly Cost"],
+        )
+    )
+
     annual_total = subs["Est Monthly Cost"].sum() * 12
     sub_rows += f"""
 <tr style="background:#F8FAFC;">
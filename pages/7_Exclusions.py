@@ -12,6 +12,7 @@ from utils import (
     inject_global_css,
     load_all,
     load_custom_keywords,
+    load_filter_options,
     load_overrides,
     save_custom_keyword,
     save_override,
@@ -112,8 +113,8 @@ if df_all.empty:
     st.error("No data found. Drop CSVs into `data/` and click Reload.")
     st.stop()
 
-df_exp = df_all[df_all["RecordType"] == "expense"].copy()
-all_categories = sorted(df_all["Category"].dropna().unique().tolist())
+df_exp = df_all[df_all["RecordType"] == "expense"]
+all_categories = load_filter_options()["categories"]
 
 search_col, year_col = st.columns([3, 1])
 with search_col:
@@ -123,20 +124,20 @@ with search_col:
         label_visibility="collapsed",
     )
 with year_col:
-    years = ["All years"] + sorted(df_exp["Date"].dt.year.unique().tolist(), reverse=True)
+    years = ["All years"] + sorted(df_exp["Year"].unique().tolist(), reverse=True)
     year_filter = st.selectbox("Year", years, label_visibility="collapsed")
 
 if search:
-    df_exp = df_exp[df_exp["Description"].str.contains(search, case=False, na=False)]
+    df_exp = df_exp[df_exp["Description"].str.contains(search, case=False, na=False, regex=False)]
 if year_filter != "All years":
-    df_exp = df_exp[df_exp["Date"].dt.year == int(year_filter)]
+    df_exp = df_exp[df_exp["Year"] == int(year_filter)]
 
 df_sorted = df_exp.sort_values(["Date", "Amount"], ascending=[False, False]).head(300)
 
 if df_sorted.empty:
     st.info("No transactions match. Try a different search term or year.")
 else:
-    df_display = df_sorted[["Date", "Description", "Amount", "Category", "Card"]].copy()
+    df_display = df_sorted[["Date", "Description", "Amount", "Category", "Card"]]
     df_display["Date"]   = df_display["Date"].dt.strftime("%Y-%m-%d")
     df_display["Amount"] = df_display["Amount"].round(2)
     df_display = df_display.reset_index(drop=True)
@@ -5,7 +5,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 import plotly.graph_objects as go
 import streamlit as st
 
-from utils import ACCENT, date_filter, format_year_month, inject_global_css, load_all, render_nav_bar, render_stat_card
+from utils import ACCENT, date_filter, format_year_month, inject_global_css, load_all, render_nav_bar, render_stat_card, slice_date_range
 
 inject_global_css()
 render_nav_bar()
@@ -31,18 +31,17 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ── Filters ───────────────────────────────────────────────────────────────────
-start, end, selected_card = date_filter(df_all, key="tfr", default_preset="Last 12 months")
+start, end, selected_card = date_filter(key="tfr", default_preset="Last 12 months")
 st.markdown("<div style='margin-bottom:16px;'></div>", unsafe_allow_html=True)
 
 # ── Apply filters ─────────────────────────────────────────────────────────────
-df = df_all.copy()
+df = slice_date_range(df_all, start, end)
 if selected_card != "All cards":
     df = df[df["Card"] == selected_card]
-df = df[(df["Date"].dt.date >= start) & (df["Date"].dt.date <= end)]
 
-df_tfr    = df[df["RecordType"] == "transfer"].copy()
-df_exp    = df[df["RecordType"] == "expense"].copy()
-df_income = df[df["RecordType"] == "income"].copy()
+df_tfr    = df[df["RecordType"] == "transfer"]
+df_exp    = df[df["RecordType"] == "expense"]
+df_income = df[df["RecordType"] == "income"]
 has_income = not df_income.empty
 
 if df_tfr.empty:
@@ -79,12 +78,12 @@ st.markdown("<div style='margin-bottom:24px;'></div>", unsafe_allow_html=True)
 # ── Monthly transfer chart ────────────────────────────────────────────────────
 st.markdown("<div class='section-title'>Monthly Transfers</div>", unsafe_allow_html=True)
 
+# load_all() is sorted by Date, so unsorted groupby keys already come out in month order
 monthly = (
-    df_tfr.groupby("YearMonth")["Amount"].sum()
+    df_tfr.groupby("YearMonth", sort=False)["Amount"].sum()
     .reset_index().rename(columns={"Amount": "Total"})
-    .sort_values("YearMonth")
 )
-monthly["Month"] = monthly["YearMonth"].astype(str).map(format_year_month)
+monthly["Month"] = monthly["YearMonth"].map(format_year_month)
 avg_val = monthly["Total"].mean()
 
 fig = go.Figure()
@@ -123,7 +122,7 @@ st.plotly_chart(fig, use_container_width=True)
 st.markdown("<div class='section-title'>By Destination</div>", unsafe_allow_html=True)
 
 dest = (
-    df_tfr.groupby("Description")["Amount"]
+    df_tfr.groupby("Description", observed=True, sort=False)["Amount"]
     .agg(["sum", "count"])
     .rename(columns={"sum": "Total", "count": "Transfers"})
     .sort_values("Total", ascending=False)
@@ -133,22 +132,24 @@ dest = (
 dest["% of Total"] = dest["Total"] / total_tfr * 100
 
 dest_rows = ""
-for i, row in dest.iterrows():
-    bar_w = min(row["% of Total"] * 2, 100)
+for destination, total, n_transfers, share in dest[
+    ["Destination", "Total", "Transfers", "% of Total"]
+].itertuples(index=False, name=None):
+    bar_w = min(share * 2, 100)
     dest_rows += (
         f"<tr style='border-bottom:1px solid #F1F5F9;'>"
         f"<td style='padding:10px 16px;font-family:\"DM Sans\",sans-serif;font-size:14px;"
-        f"color:#0F172A;font-weight:500;'>{row['Destination']}</td>"
+        f"color:#0F172A;font-weight:500;'>{destination}</td>"
         f"<td style='padding:10px 16px;'>"
         f"<div style='display:flex;align-items:center;gap:10px;'>"
         f"<div style='background:#0EA5E9;height:6px;border-radius:3px;"
         f"width:{bar_w:.0f}px;min-width:4px;'></div>"
         f"<span style='font-family:\"DM Sans\",sans-serif;font-size:12px;color:#94A3B8;'>"
-        f"{row['% of Total']:.1f}%</span></div></td>"
+        f"{share:.1f}%</span></div></td>"
         f"<td style='padding:10px 16px;font-family:\"DM Sans\",sans-serif;font-size:13px;"
-        f"color:#64748B;text-align:center;'>{int(row['Transfers'])}×</td>"
+        f"color:#64748B;text-align:center;'>{int(n_transfers)}×</td>"
         f"<td style='padding:10px 16px;font-family:\"DM Mono\",monospace;font-size:14px;"
-        f"color:#0F172A;text-align:right;'>${row['Total']:,.0f}</td>"
+        f"color:#0F172A;text-align:right;'>${total:,.0f}</td>"
         f"</tr>"
     )
 
@@ -172,20 +173,22 @@ st.markdown(
 # ── Full transfer list ────────────────────────────────────────────────────────
 st.markdown("<div class='section-title'>All Transfers</div>", unsafe_allow_html=True)
 
-tfr_display = df_tfr.sort_values("Date", ascending=False).copy()
+tfr_display = df_tfr.sort_values("Date", ascending=False)
 tfr_rows = ""
-for _, row in tfr_display.iterrows():
-    date_str = row["Date"].strftime("%b %d, %Y")
+for date, description, card, amount in tfr_display[
+    ["Date", "Description", "Card", "Amount"]
+].itertuples(index=False, name=None):
+    date_str = date.strftime("%b %d, %Y")
     tfr_rows += (
         f"<tr style='border-bottom:1px solid #F1F5F9;'>"
         f"<td style='padding:10px 12px;font-family:\"DM Sans\",sans-serif;font-size:13px;"
         f"color:#64748B;white-space:nowrap;'>{date_str}</td>"
         f"<td style='padding:10px 12px;font-family:\"DM Sans\",sans-serif;font-size:14px;"
-        f"color:#0F172A;font-weight:500;'>{row['Description']}</td>"
+        f"color:#0F172A;font-weight:500;'>{description}</td>"
         f"<td style='padding:10px 12px;font-family:\"DM Sans\",sans-serif;font-size:12px;"
-        f"color:#94A3B8;'>{row.get('Card', '')}</td>"
+        f"color:#94A3B8;'>{card}</td>"
         f"<td style='padding:10px 12px;font-family:\"DM Mono\",monospace;font-size:14px;"
-        f"color:#0EA5E9;font-weight:500;text-align:right;'>${row['Amount']:,.2f}</td>"
+        f"color:#0EA5E9;font-weight:500;text-align:right;'>${amount:,.2f}</td>"
         f"</tr>"
     )
 
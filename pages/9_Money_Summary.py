@@ -8,7 +8,7 @@ import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
 
-from utils import ACCENT, inject_global_css, load_all, load_finance_config, render_drilldown, render_nav_bar, render_stat_card
+from utils import ACCENT, inject_global_css, load_all, load_filter_options, load_finance_config, render_drilldown, render_nav_bar, render_stat_card
 
 inject_global_css()
 render_nav_bar()
@@ -34,21 +34,22 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ── Year + Card selectors ─────────────────────────────────────────────────────
+filter_options = load_filter_options()
 sel_col, card_col, _ = st.columns([2, 1.5, 4])
 with sel_col:
-    available_years = sorted(df_all["Date"].dt.year.unique(), reverse=True)
+    available_years = filter_options["years"]
     selected_year = st.selectbox("Year", available_years, index=0, label_visibility="collapsed")
 with card_col:
-    card_options = ["All cards"] + sorted(df_all["Card"].dropna().unique().tolist())
+    card_options = ["All cards"] + filter_options["cards"]
     selected_card = st.selectbox("Card", card_options, index=0, label_visibility="collapsed")
 
 st.markdown("<div style='margin-bottom:16px;'></div>", unsafe_allow_html=True)
 
 # ── Filter data ───────────────────────────────────────────────────────────────
-df = df_all.copy()
+df = df_all
 if selected_card != "All cards":
     df = df[df["Card"] == selected_card]
-df_year = df[df["Date"].dt.year == selected_year]
+df_year = df[df["Year"] == selected_year]
 
 df_exp    = df_year[df_year["RecordType"] == "expense"]
 df_income = df_year[df_year["RecordType"] == "income"]
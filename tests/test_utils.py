@@ -13,9 +13,12 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import utils
 from utils import (
-    clean_merchant, compute_date_range, compute_insights, detect_subscriptions,
-    _get_config, _load_checking, CARD_CONFIG, CC_PAYMENT_KEYWORDS,
+    clean_merchant, compute_date_range, compute_insights, covers_whole_months,
+    detect_subscriptions, format_year_month, month_code, pivot_monthly_totals,
+    slice_date_range, slice_monthly_totals,
+    _get_config, _load_checking, load_card, CARD_CONFIG, CC_PAYMENT_KEYWORDS,
 )
 
 
@@ -25,7 +28,7 @@ def make_df(rows: list[dict]) -> pd.DataFrame:
     """Build a minimal transactions DataFrame from a list of dicts."""
     df = pd.DataFrame(rows)
     df["Date"]      = pd.to_datetime(df["Date"])
-    df["YearMonth"] = df["Date"].dt.to_period("M")
+    df["YearMonth"] = month_code(df["Date"].dt.year, df["Date"].dt.month)
     return df
 
 
@@ -131,6 +134,105 @@ class TestComputeDateRange:
         assert end   == datetime.date(2025, 12, 31)
 
 
+# ── covers_whole_months ───────────────────────────────────────────────────────
+
+class TestCoversWholeMonths:
+    MIN_DATE = datetime.date(2024, 1, 10)
+    MAX_DATE = datetime.date(2026, 2, 20)
+
+    def _covers(self, start, end):
+        return covers_whole_months(start, end, self.MIN_DATE, self.MAX_DATE)
+
+    def test_calendar_months(self):
+        assert self._covers(datetime.date(2025, 3, 1), datetime.date(2025, 5, 31))
+
+    def test_range_ending_at_max_date(self):
+        """Rolling presets end at max_date mid-month — still whole months of data."""
+        assert self._covers(datetime.date(2025, 11, 1), self.MAX_DATE)
+
+    def test_range_starting_at_min_date(self):
+        assert self._covers(self.MIN_DATE, datetime.date(2024, 12, 31))
+
+    def test_split_start_month(self):
+        assert not self._covers(datetime.date(2025, 3, 15), datetime.date(2025, 5, 31))
+
+    def test_split_end_month(self):
+        assert not self._covers(datetime.date(2025, 3, 1), datetime.date(2025, 5, 30))
+
+
+# ── slice_date_range ──────────────────────────────────────────────────────────
+
+class TestSliceDateRange:
+    def _df(self):
+        df = make_df([
+            {"Date": d, "Description": "x", "Amount": 1.0, "Category": "c", "Card": "Chase"}
+            for d in ["2025-01-31", "2025-02-01", "2025-02-14", "2025-02-28", "2025-03-01"]
+        ])
+        # Late-evening timestamp on the last day must still fall inside the range
+        df.loc[3, "Date"] += pd.Timedelta(hours=23, minutes=59)
+        return df
+
+    def test_bounds_are_inclusive_whole_days(self):
+        got = slice_date_range(self._df(), datetime.date(2025, 2, 1), datetime.date(2025, 2, 28))
+        assert [d.day for d in got["Date"]] == [1, 14, 28]
+
+    def test_single_day(self):
+        got = slice_date_range(self._df(), datetime.date(2025, 2, 14), datetime.date(2025, 2, 14))
+        assert len(got) == 1
+
+    def test_range_outside_data_is_empty(self):
+        got = slice_date_range(self._df(), datetime.date(2026, 1, 1), datetime.date(2026, 12, 31))
+        assert got.empty
+
+
+# ── month_code / format_year_month ────────────────────────────────────────────
+
+class TestMonthCode:
+    def test_consecutive_across_year_boundary(self):
+        assert month_code(2025, 1) - month_code(2024, 12) == 1
+
+    def test_format_round_trip(self):
+        assert format_year_month(month_code(2025, 11)) == "Nov 2025"
+        assert format_year_month(month_code(2024, 12) + 1) == "Jan 2025"
+
+
+# ── pivot_monthly_totals / slice_monthly_totals ───────────────────────────────
+
+class TestSliceMonthlyTotals:
+    ROWS = [
+        {"Date": "2025-01-05", "Description": "Target",  "Amount": 50.0,   "Category": "Shopping", "Card": "Chase",    "RecordType": "expense"},
+        {"Date": "2025-01-20", "Description": "Cafe",    "Amount": 10.0,   "Category": "Dining",   "Card": "Freedom",  "RecordType": "expense"},
+        {"Date": "2025-02-03", "Description": "Target",  "Amount": 25.0,   "Category": "Shopping", "Card": "Chase",    "RecordType": "expense"},
+        {"Date": "2025-02-15", "Description": "Payroll", "Amount": 3000.0, "Category": "Income",   "Card": "Checking", "RecordType": "income"},
+        {"Date": "2025-03-15", "Description": "Payroll", "Amount": 3000.0, "Category": "Income",   "Card": "Checking", "RecordType": "income"},
+    ]
+
+    def _totals(self):
+        return pivot_monthly_totals(make_df(self.ROWS))
+
+    def test_all_cards_matches_groupby(self):
+        df = make_df(self.ROWS)
+        expected = df[df["RecordType"] == "expense"].groupby("YearMonth")["Amount"].sum()
+        got = slice_monthly_totals(self._totals(), "expense").sum(axis=1)
+        assert got.to_dict() == expected.to_dict()
+
+    def test_months_without_matching_rows_are_dropped(self):
+        """March only has income — it must not show up as a $0 expense month."""
+        got = slice_monthly_totals(self._totals(), "expense")
+        assert list(got.index) == [month_code(2025, 1), month_code(2025, 2)]
+
+    def test_card_filter(self):
+        got = slice_monthly_totals(self._totals(), "expense", card="Freedom")
+        assert list(got.columns) == ["Dining"]
+        assert got["Dining"].sum() == 10.0
+
+    def test_date_bounds(self):
+        got = slice_monthly_totals(self._totals(), "expense",
+                                   start=datetime.date(2025, 2, 1), end=datetime.date(2025, 2, 28))
+        assert list(got.columns) == ["Shopping"]
+        assert got["Shopping"].sum() == 25.0
+
+
 # ── detect_subscriptions ──────────────────────────────────────────────────────
 
 class TestDetectSubscriptions:
@@ -176,6 +278,17 @@ class TestDetectSubscriptions:
         subs = detect_subscriptions(df)
         assert subs.empty
 
+    def test_interleaved_merchants_are_kept_apart(self):
+        """Rows arrive in date order — gaps must only be measured within one merchant."""
+        rows = []
+        for month in ["2025-01", "2025-02", "2025-03"]:
+            rows.append({"Date": f"{month}-05", "Description": "Spotify", "Amount": 11.99, "Category": "Entertainment", "Card": "Chase"})
+            rows.append({"Date": f"{month}-20", "Description": "Netflix", "Amount": 15.99, "Category": "Entertainment", "Card": "Chase"})
+        subs = detect_subscriptions(make_df(rows))
+        assert sorted(subs["Merchant"]) == ["Netflix", "Spotify"]
+        assert (subs["Cadence"] == "Monthly").all()
+        assert subs.set_index("Merchant").loc["Spotify", "First Seen"] == datetime.date(2025, 1, 5)
+
 
 # ── compute_insights ──────────────────────────────────────────────────────────
 
@@ -347,6 +460,17 @@ class TestLoadChecking:
         assert "RecordType" in df.columns
         assert "Amount" in df.columns
 
+    def test_empty_result_concats_without_upcasting(self):
+        """A checking file with only CC payments mustn't turn Date into object."""
+        raw = make_checking_df([{
+            "Posting Date": "2025-01-25", "Description": "Autopay Chase Card",
+            "Amount": -1200.00, "Details": "Debit",
+        }])
+        cards = make_df([{"Date": "2025-01-10", "Description": "x", "Amount": 5.0, "Category": "c", "Card": "Chase"}])
+        df = pd.concat([cards, _load_checking(raw, "Checking", self.CFG)], ignore_index=True)
+        assert pd.api.types.is_datetime64_any_dtype(df["Date"])
+        assert df["Amount"].dtype == "float64"
+
     def test_amount_is_always_positive(self):
         """Stored Amount should be the absolute value regardless of CSV sign."""
         raw = make_checking_df([
@@ -355,3 +479,167 @@ class TestLoadChecking:
         ])
         df = _load_checking(raw, "Checking", self.CFG)
         assert (df["Amount"] >= 0).all()
+
+
+# ── load_card ─────────────────────────────────────────────────────────────────
+
+class TestLoadCard:
+    def test_credit_card_csv(self, tmp_path):
+        path = tmp_path / "sapphire.csv"
+        path.write_text(
+            "Transaction Date,Post Date,Description,Category,Type,Amount,Memo\n"
+            "01/15/2025,01/16/2025, Coffee Shop ,Food & Drink,Sale,-4.50,\n"
+            "01/20/2025,01/20/2025,Refund,Shopping,Return,12.00,\n"
+        )
+        df = load_card(path)
+        assert len(df) == 1                      # refund (positive CSV amount) dropped
+        assert df.iloc[0]["Date"] == pd.Timestamp("2025-01-15")
+        assert df.iloc[0]["Description"] == "Coffee Shop"
+        assert df.iloc[0]["Amount"] == 4.50
+        assert df.iloc[0]["Card"] == "Sapphire"
+
+    def test_checking_csv_with_trailing_commas(self, tmp_path):
+        """Chase checking rows carry one more field than the header."""
+        path = tmp_path / "checking.csv"
+        path.write_text(
+            "Details,Posting Date,Description,Amount,Type,Balance,Check or Slip #\n"
+            "CREDIT,01/15/2025,Payroll,2500.00,ACH_CREDIT,3000.00,,\n"
+            "DEBIT,01/20/2025,Grocery Store,-45.00,DEBIT_CARD,2955.00,,\n"
+        )
+        df = load_card(path)
+        assert df["RecordType"].tolist() == ["income", "expense"]
+        assert df["Amount"].tolist() == [2500.00, 45.00]
+        assert df.iloc[1]["Date"] == pd.Timestamp("2025-01-20")
+
+
+# ── _load_csvs (Parquet sidecar) ──────────────────────────────────────────────
+
+class TestLoadCsvsSidecar:
+    HEADER = "Transaction Date,Post Date,Description,Category,Type,Amount,Memo\n"
+
+    def test_sidecar_is_written_and_reused(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(utils, "CSV_CACHE_PATH", tmp_path / "csv_cache.parquet")
+        path = tmp_path / "sapphire.csv"
+        path.write_text(self.HEADER + "01/15/2025,01/16/2025,Coffee,Food & Drink,Sale,-4.50,\n")
+
+        first = utils._load_csvs([path])
+        assert utils.CSV_CACHE_PATH.exists()
+        pd.testing.assert_frame_equal(utils._load_csvs([path]), first)
+
+    def test_changed_csv_is_reparsed(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(utils, "CSV_CACHE_PATH", tmp_path / "csv_cache.parquet")
+        path = tmp_path / "sapphire.csv"
+        path.write_text(self.HEADER + "01/15/2025,01/16/2025,Coffee,Food & Drink,Sale,-4.50,\n")
+        utils._load_csvs([path])
+
+        path.write_text(self.HEADER + "01/15/2025,01/16/2025,Coffee,Food & Drink,Sale,-4.50,\n"
+                                      "01/16/2025,01/17/2025,Lunch,Food & Drink,Sale,-12.00,\n")
+        assert len(utils._load_csvs([path])) == 2
+
+    def test_unconvertible_frame_is_returned_uncached(self, tmp_path, monkeypatch):
+        """A mixed-type column Arrow can't convert skips the sidecar, not the load."""
+        monkeypatch.setattr(utils, "CSV_CACHE_PATH", tmp_path / "csv_cache.parquet")
+        mixed = pd.DataFrame({"Description": ["Coffee", "Lunch"], "Memo": [1, "note"]})
+        monkeypatch.setattr(utils, "load_card", lambda path: mixed)
+        path = tmp_path / "sapphire.csv"
+        path.write_text(self.HEADER)
+
+        got = utils._load_csvs([path])
+        assert got["Memo"].tolist() == [1, "note"]
+        assert not utils.CSV_CACHE_PATH.exists()
+
+    def test_changed_keywords_are_reparsed(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(utils, "CSV_CACHE_PATH", tmp_path / "csv_cache.parquet")
+        path = tmp_path / "checking.csv"
+        path.write_text("Details,Posting Date,Description,Amount\n"
+                        "DEBIT,01/15/2025,SCHWAB BROKERAGE,-100.00\n")
+        assert utils._load_csvs([path])["RecordType"].tolist() == ["transfer"]
+
+        monkeypatch.setattr(utils, "TRANSFER_KEYWORDS", ["fidelity"])
+        assert utils._load_csvs([path])["RecordType"].tolist() == ["expense"]
+
+
+# ── load_all ──────────────────────────────────────────────────────────────────
+
+class TestLoadAll:
+    @pytest.fixture
+    def data_dir(self, tmp_path, monkeypatch):
+        for name, path in [("DATA_DIR", tmp_path), ("CSV_CACHE_PATH", tmp_path / "csv_cache.parquet"),
+                           ("OVERRIDES_PATH", tmp_path / "overrides.csv"),
+                           ("CUSTOM_KEYWORDS_PATH", tmp_path / "transfer_keywords.csv")]:
+            monkeypatch.setattr(utils, name, path)
+        utils.load_all.clear()
+        yield tmp_path
+        utils.load_all.clear()
+
+    def test_rows_without_a_date_are_dropped(self, data_dir):
+        (data_dir / "sapphire.csv").write_text(
+            TestLoadCsvsSidecar.HEADER
+            + "01/15/2025,01/16/2025,Coffee,Food & Drink,Sale,-4.50,\n"
+            + ",01/17/2025,Lunch,Food & Drink,Sale,-12.00,\n"
+        )
+        df = utils.load_all()
+        assert df["Description"].tolist() == ["Coffee"]
+        assert df["YearMonth"].tolist() == [month_code(2025, 1)]
+
+    def test_rows_without_category_still_count(self, data_dir):
+        (data_dir / "merged.csv").write_text(
+            "Date,Description,Category,Amount,Card,RecordType\n"
+            "2025-01-05,Cafe,Food,10.0,Chase,expense\n"
+            "2025-01-09,Misc,,5.0,Chase,expense\n"
+            "2025-02-11,Misc,,7.0,Chase,expense\n"
+        )
+        df = utils.load_all()
+        assert df["Category"].tolist() == ["Food", "Uncategorized", "Uncategorized"]
+        got = slice_monthly_totals(pivot_monthly_totals(df), "expense").sum(axis=1)
+        assert got.to_dict() == {month_code(2025, 1): 15.0, month_code(2025, 2): 7.0}
+
+
+# ── load_filter_options ───────────────────────────────────────────────────────
+
+class TestLoadFilterOptions:
+    def test_options_come_from_load_all(self, monkeypatch):
+        df = make_df([
+            {"Date": "2024-12-30", "Description": "A", "Amount": 10.0, "Category": "Travel", "Card": "Sapphire"},
+            {"Date": "2025-03-02", "Description": "B", "Amount": 20.0, "Category": "Dining", "Card": "Freedom"},
+        ])
+        df["Year"] = df["Date"].dt.year
+        monkeypatch.setattr(utils, "load_all", lambda: df)
+        utils.load_filter_options.clear()
+        try:
+            options = utils.load_filter_options()
+        finally:
+            utils.load_filter_options.clear()
+        assert options["n_rows"] == 2
+        assert options["cards"] == ["Freedom", "Sapphire"]
+        assert options["categories"] == ["Dining", "Travel"]
+        assert options["category_colors"] == {"Dining": utils.CAT_COLORS[0], "Travel": utils.CAT_COLORS[1]}
+        assert options["years"] == [2025, 2024]
+        assert options["min_date"] == datetime.date(2024, 12, 30)
+        assert options["max_date"] == datetime.date(2025, 3, 2)
+
+
+# ── filtered_expenses ─────────────────────────────────────────────────────────
+
+class TestFilteredExpenses:
+    @pytest.fixture
+    def df(self, monkeypatch):
+        df = make_df([
+            {"Date": "2025-01-31", "Description": "A", "Amount": 10.0, "Card": "Sapphire", "RecordType": "expense"},
+            {"Date": "2025-02-01", "Description": "B", "Amount": 20.0, "Card": "Freedom",  "RecordType": "expense"},
+            {"Date": "2025-02-15", "Description": "C", "Amount": 30.0, "Card": "Checking", "RecordType": "income"},
+            {"Date": "2025-02-28", "Description": "D", "Amount": 40.0, "Card": "Sapphire", "RecordType": "expense"},
+            {"Date": "2025-03-01", "Description": "E", "Amount": 50.0, "Card": "Sapphire", "RecordType": "expense"},
+        ])
+        monkeypatch.setattr(utils, "load_all", lambda: df)
+        utils.filtered_expenses.clear()
+        yield df
+        utils.filtered_expenses.clear()
+
+    def test_inclusive_date_range_expenses_only(self, df):
+        out = utils.filtered_expenses(datetime.date(2025, 2, 1), datetime.date(2025, 2, 28), "All cards")
+        assert out["Description"].tolist() == ["B", "D"]
+
+    def test_single_card(self, df):
+        out = utils.filtered_expenses(datetime.date(2025, 1, 1), datetime.date(2025, 3, 31), "Sapphire")
+        assert out["Description"].tolist() == ["A", "D", "E"]
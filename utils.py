@@ -1,9 +1,17 @@
 """Shared constants, data loaders, and helpers for the Spending Tracker app."""
 
+import calendar
+import functools
+import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 import streamlit as st
 
 # ── Theme ─────────────────────────────────────────────────────────────────────
@@ -21,6 +29,7 @@ CAT_COLORS = [
 CARD_CONFIG = {
     "default": {                        # Chase credit card (standard)
         "date_col":    "Transaction Date",
+        "date_fmt":    "%m/%d/%Y",
         "desc_col":    "Description",
         "cat_col":     "Category",
         "amount_col":  "Amount",
@@ -29,6 +38,7 @@ CARD_CONFIG = {
     },
     "checking": {                       # Chase checking — matches any filename containing "checking"
         "date_col":    "Posting Date",
+        "date_fmt":    "%m/%d/%Y",
         "desc_col":    "Description",
         "cat_col":     None,            # no category column
         "amount_col":  "Amount",
@@ -56,6 +66,7 @@ DATA_DIR              = Path(__file__).parent / "data"
 OVERRIDES_PATH        = DATA_DIR / "overrides.csv"
 CUSTOM_KEYWORDS_PATH  = DATA_DIR / "transfer_keywords.csv"
 FINANCE_CONFIG_PATH   = DATA_DIR / "finance_config.csv"
+CSV_CACHE_PATH        = DATA_DIR / "csv_cache.parquet"   # parsed raw CSVs when there's no merged.csv
 _OVERRIDE_COLS        = ["Date", "Description", "OriginalAmount", "Action", "NewAmount", "NewCategory", "Notes"]
 _FINANCE_CONFIG_COLS  = ["Name", "Type", "AmountPerYear", "EmployerMatch", "Notes"]
 
@@ -153,6 +164,15 @@ def save_finance_config_entry(name: str, type_: str, amount_per_year: float,
 
 
 # ── Data loading ──────────────────────────────────────────────────────────────
+def month_code(year, month):
+    """YearMonth code: year * 12 + month - 1, for ints or integer arrays.
+
+    Consecutive months are consecutive integers, so "previous month" is code - 1
+    and groupbys/comparisons run on plain ints rather than pd.Period objects.
+    """
+    return year * 12 + month - 1
+
+
 def _get_config(card_key: str) -> dict:
     """Return the right CARD_CONFIG entry for a given file stem."""
     if card_key in CARD_CONFIG:
@@ -166,46 +186,68 @@ def _get_config(card_key: str) -> dict:
 def _load_checking(raw: pd.DataFrame, card_name: str, cfg: dict) -> pd.DataFrame:
     """Parse a Chase checking CSV into income + expense rows."""
     details_col = cfg.get("details_col", "Details")
-    rows = []
-    for _, r in raw.iterrows():
-        desc       = str(r[cfg["desc_col"]]).strip()
-        amount_raw = float(r[cfg["amount_col"]])
-        details    = str(r.get(details_col, "")).strip().title()  # "Credit" or "Debit"
-        is_credit  = details == "Credit" or amount_raw > 0
-
-        if not is_credit and any(kw in desc.lower() for kw in CC_PAYMENT_KEYWORDS):
-            continue  # Skip — already counted in credit card CSV
-
-        desc_lower = desc.lower()
-        is_transfer = any(kw in desc_lower for kw in TRANSFER_KEYWORDS)
-        if is_transfer:
-            record_type = "transfer"
-            category    = "Transfer"
-        elif is_credit:
-            record_type = "income"
-            category    = "Income"
-        else:
-            record_type = "expense"
-            category    = "Uncategorized"
-
-        rows.append({
-            "Date":        pd.to_datetime(r[cfg["date_col"]]),
-            "Description": desc,
-            "Category":    category,
-            "Amount":      abs(amount_raw),
-            "Card":        card_name,
-            "RecordType":  record_type,
-        })
+    desc        = raw[cfg["desc_col"]].astype(str).str.strip()
+    desc_lower  = desc.str.lower()
+    amount_raw  = raw[cfg["amount_col"]].astype(float)
+    details     = (  # "Credit" or "Debit"
+        raw[details_col].astype(str).str.strip().str.title()
+        if details_col in raw.columns else pd.Series("", index=raw.index)
+    )
+    is_credit   = ((details == "Credit") | (amount_raw > 0)).to_numpy()
+
+    # One regex sweep per keyword list instead of a Python substring test per row/keyword
+    is_cc_payment = desc_lower.str.contains("|".join(map(re.escape, CC_PAYMENT_KEYWORDS)), na=False).to_numpy()
+    is_transfer   = desc_lower.str.contains("|".join(map(re.escape, TRANSFER_KEYWORDS)), na=False).to_numpy()
+
+    keep = is_credit | ~is_cc_payment   # CC payments out of checking are already counted in the card CSV
+    if not keep.any():
+        # Typed like a non-empty result so pd.concat keeps Date/Amount blocks as-is
+        # instead of upcasting every card's columns to object.
+        return pd.DataFrame(columns=["Date", "Description", "Category", "Amount", "Card", "RecordType"]).astype(
+            {"Date": "datetime64[us]", "Amount": "float64"}
+        )
+
+    is_transfer, is_credit = is_transfer[keep], is_credit[keep]
+    return pd.DataFrame({
+        "Date":        pd.to_datetime(raw.loc[keep, cfg["date_col"]]).to_numpy(),
+        "Description": desc[keep].to_numpy(),
+        "Category":    np.select([is_transfer, is_credit], ["Transfer", "Income"], "Uncategorized"),
+        "Amount":      amount_raw[keep].abs().to_numpy(),
+        "Card":        card_name,
+        "RecordType":  np.select([is_transfer, is_credit], ["transfer", "income"], "expense"),
+    })
 
-    if not rows:
-        return pd.DataFrame(columns=["Date", "Description", "Category", "Amount", "Card", "RecordType"])
-    return pd.DataFrame(rows)
+
+def _read_export(path: Path, cfg: dict) -> pd.DataFrame:
+    """Read a bank CSV with PyArrow's multi-threaded parser, dates and amounts typed up front.
+
+    Chase checking exports end every data row with an extra trailing comma, which
+    Arrow rejects as a column-count mismatch; those (and any other file Arrow can't
+    parse) go through pandas with index_col=False instead.
+    """
+    convert = pacsv.ConvertOptions(
+        column_types={cfg["date_col"]: pa.timestamp("us"), cfg["amount_col"]: pa.float64()},
+        timestamp_parsers=[cfg["date_fmt"], pacsv.ISO8601],
+    )
+    try:
+        # self_destruct frees each Arrow column as it is converted, so the table
+        # and the DataFrame are never both fully resident.
+        return pacsv.read_csv(path, convert_options=convert).to_pandas(
+            split_blocks=True, self_destruct=True
+        )
+    except pa.ArrowInvalid:
+        # date_format keeps the parse on the strptime fast path; a file in some
+        # other format is left as strings for pd.to_datetime to infer.
+        return pd.read_csv(
+            path, index_col=False,
+            parse_dates=[cfg["date_col"]], date_format=cfg["date_fmt"],
+        )
 
 
 def load_card(path: Path) -> pd.DataFrame:
     card_key = path.stem.lower()
     cfg = _get_config(card_key)
-    raw = pd.read_csv(path, index_col=False)
+    raw = _read_export(path, cfg)
     raw.columns = raw.columns.str.strip()
 
     if cfg.get("is_checking"):
@@ -223,22 +265,69 @@ def load_card(path: Path) -> pd.DataFrame:
     df["Amount"]      = raw[cfg["amount_col"]] * cfg["amount_sign"]
     df["Card"]        = path.stem.title()
     df["RecordType"]  = "expense"
-    df = df[df["Amount"] > 0].copy()
+    df = df[df["Amount"] > 0]
+    return df
+
+
+def _load_csvs(csvs: list) -> pd.DataFrame:
+    """load_card() of every CSV, concatenated — reused from CSV_CACHE_PATH when unchanged.
+
+    The Parquet sidecar stores each source file's name, size and mtime in its schema
+    metadata, along with the parsing config (CARD_CONFIG and the keyword lists); if
+    anything differs (file added, removed, re-exported, config edited) every CSV is
+    re-parsed and the sidecar rewritten. A sidecar that can't be read, converted or
+    written is simply skipped.
+    """
+    sources = json.dumps([
+        [[p.name, p.stat().st_size, p.stat().st_mtime_ns] for p in csvs],
+        [CARD_CONFIG, CC_PAYMENT_KEYWORDS, TRANSFER_KEYWORDS],
+    ]).encode()
+    try:
+        if (CSV_CACHE_PATH.exists()
+                and pq.read_schema(CSV_CACHE_PATH).metadata.get(b"sources") == sources):
+            return pd.read_parquet(CSV_CACHE_PATH)
+    except Exception:
+        pass
+
+    # Files are independent and Arrow's parser releases the GIL; map() keeps order
+    with ThreadPoolExecutor() as pool:
+        df = pd.concat(list(pool.map(load_card, csvs)), ignore_index=True)
+    # Best-effort: a frame Arrow can't convert (e.g. a mixed-type column from the
+    # pandas fallback parser) just goes uncached.
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"sources": sources})
+        pq.write_table(table, CSV_CACHE_PATH, compression="zstd")
+    except (OSError, pa.ArrowException):
+        pass
     return df
 
 
 @st.cache_data
 def load_all() -> pd.DataFrame:
-    merged = DATA_DIR / "merged.csv"
-    if merged.exists():
-        df = pd.read_csv(merged, parse_dates=["Date"])
+    merged    = DATA_DIR / "merged.csv"
+    merged_pq = DATA_DIR / "merged.parquet"
+    # merge.py writes both; the typed, columnar Parquet copy loads without any
+    # CSV parsing unless merged.csv is newer (e.g. an older merge.py was run).
+    if merged_pq.exists() and (not merged.exists() or merged_pq.stat().st_mtime >= merged.stat().st_mtime):
+        df = pd.read_parquet(merged_pq)
+    elif merged.exists():
+        # Card is never reassigned below, so it can be parsed straight to categorical
+        df = pd.read_csv(merged, parse_dates=["Date"], dtype={"Card": "category"})
     else:
         csvs = sorted(DATA_DIR.glob("*.[Cc][Ss][Vv]"))
         if not csvs:
             return pd.DataFrame()
-        df = pd.concat([load_card(p) for p in csvs], ignore_index=True)
-    df["YearMonth"]   = df["Date"].dt.to_period("M")
-    df["Description"] = df["Description"].apply(clean_merchant)
+        df = _load_csvs(csvs)
+    # A row with a blank or unparseable date belongs to no month; drop it before
+    # the integer Year/YearMonth casts, which can't hold NaT.
+    df = df[df["Date"].notna()]
+    df["Year"]        = df["Date"].dt.year.astype("int16")
+    df["YearMonth"]   = month_code(df["Year"].to_numpy(np.int32), df["Date"].dt.month.to_numpy(np.int32))
+    # Merchants repeat heavily — clean each distinct name once and map it back
+    # (missing descriptions stay missing).
+    names = df["Description"].dropna().unique()
+    df["Description"] = df["Description"].map(dict(zip(names, map(clean_merchant, names))))
     # Backward-compat: existing merged.csv won't have RecordType
     if "RecordType" not in df.columns:
         df["RecordType"] = "expense"
@@ -247,22 +336,30 @@ def load_all() -> pd.DataFrame:
     if OVERRIDES_PATH.exists():
         try:
             ov = pd.read_csv(OVERRIDES_PATH, parse_dates=["Date"])
+            # Match keys are computed once rather than per override row; only
+            # amt can change in the loop, and it is kept in step with Amount.
+            day  = df["Date"].dt.normalize().to_numpy()
+            desc = df["Description"].str.lower().to_numpy()
+            amt  = df["Amount"].round(2).to_numpy(copy=True)
+            keep = np.ones(len(df), dtype=bool)
             for _, ov_row in ov.iterrows():
                 mask = (
-                    (df["Date"].dt.date == ov_row["Date"].date()) &
-                    (df["Description"].str.lower() == str(ov_row["Description"]).lower()) &
-                    (df["Amount"].round(2) == round(float(ov_row["OriginalAmount"]), 2))
+                    (day == np.datetime64(ov_row["Date"].normalize())) &
+                    (desc == str(ov_row["Description"]).lower()) &
+                    (amt == round(float(ov_row["OriginalAmount"]), 2))
                 )
                 if ov_row["Action"] == "exclude":
-                    df = df[~mask].copy()
+                    keep &= ~mask
                 elif (ov_row["Action"] == "override"
                       and pd.notna(ov_row.get("NewAmount"))
                       and str(ov_row.get("NewAmount", "")).strip() != ""):
                     df.loc[mask, "Amount"] = float(ov_row["NewAmount"])
+                    amt[mask] = round(float(ov_row["NewAmount"]), 2)
                 elif (ov_row["Action"] == "recategorize"
                       and pd.notna(ov_row.get("NewCategory"))
                       and str(ov_row.get("NewCategory", "")).strip() != ""):
                     df.loc[mask, "Category"] = str(ov_row["NewCategory"])
+            df = df[keep]
         except Exception:
             pass  # Don't crash if overrides.csv is malformed
 
@@ -283,7 +380,107 @@ def load_all() -> pd.DataFrame:
         except Exception:
             pass
 
-    return df
+    # Exports can leave Category blank; label those rows instead of letting
+    # groupbys and pivots silently drop them from the totals.
+    df["Category"] = df["Category"].fillna("Uncategorized")
+
+    # Low-cardinality string columns → categoricals: filters and groupbys then
+    # work on integer codes instead of hashing Python strings row by row.
+    # Groupbys and pivots on them still spell out observed=True (the pandas 3
+    # default) so it is explicit that categories absent from a slice add no rows.
+    for col in ("Card", "Category", "RecordType", "Description"):
+        df[col] = df[col].astype("category")
+
+    # Sorted by Date so date ranges can be sliced with a binary search
+    # (see slice_date_range) instead of compared row by row.
+    return df.sort_values("Date", kind="mergesort", ignore_index=True)
+
+
+def pivot_monthly_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """Amount summed per YearMonth × (Category, Card, RecordType).
+
+    Month/category combinations with no transactions are NaN (not 0) so callers
+    can tell "no rows" apart from "rows that sum to zero".
+    """
+    if df.empty:
+        return pd.DataFrame()
+    return df.pivot_table(
+        index="YearMonth", columns=["Category", "Card", "RecordType"],
+        values="Amount", aggfunc="sum", observed=True,
+    )
+
+
+@st.cache_data
+def load_monthly_totals() -> pd.DataFrame:
+    """pivot_monthly_totals() of load_all(), built once per data load."""
+    return pivot_monthly_totals(load_all())
+
+
+@st.cache_data
+def load_filter_options() -> dict:
+    """Filter choices for load_all(), built once per data load.
+
+    Returns the row count ("n_rows"), sorted "cards", "categories" and "years"
+    (newest first) lists, a "category_colors" map cycling CAT_COLORS over the
+    sorted categories, plus the "min_date" / "max_date" datetime.date bounds, so
+    selectors don't rescan the full frame on every rerun.
+    """
+    df = load_all()
+    if df.empty:
+        return {"n_rows": 0, "cards": [], "categories": [], "category_colors": {}, "years": [],
+                "min_date": None, "max_date": None}
+    categories = sorted(df["Category"].dropna().unique().tolist())
+    return {
+        "n_rows":          len(df),
+        "cards":           sorted(df["Card"].dropna().unique().tolist()),
+        "categories":      categories,
+        "category_colors": {cat: CAT_COLORS[i % len(CAT_COLORS)] for i, cat in enumerate(categories)},
+        "years":           sorted(df["Year"].unique().tolist(), reverse=True),
+        "min_date":        df["Date"].min().date(),
+        "max_date":        df["Date"].max().date(),
+    }
+
+
+@st.cache_data(show_spinner=False)
+def filtered_expenses(start, end, card: str) -> pd.DataFrame:
+    """Expense rows of load_all() dated start..end (inclusive) for one card.
+
+    card "All cards" keeps every card. Cached per (start, end, card), so reruns
+    that leave the filters alone (sliders, search boxes) skip re-filtering.
+    """
+    # Date range first: it's a binary-search slice on load_all()'s sorted dates,
+    # so the mask below only scans rows inside the window. RecordType and card
+    # share one mask so the frame is copied once.
+    df = slice_date_range(load_all(), start, end)
+    mask = df["RecordType"] == "expense"
+    if card != "All cards":
+        mask &= df["Card"] == card
+    return df[mask]
+
+
+def slice_monthly_totals(
+    totals: pd.DataFrame,
+    record_type: str = "expense",
+    card: str = "All cards",
+    start: "datetime.date" = None,
+    end: "datetime.date" = None,
+) -> pd.DataFrame:
+    """Months × Category totals for one RecordType/card out of load_monthly_totals().
+
+    Only months and categories that have at least one matching transaction are
+    kept, mirroring what a groupby over the filtered rows would return.
+    """
+    cols = totals.columns
+    keep = cols.get_level_values("RecordType") == record_type
+    if card != "All cards":
+        keep &= cols.get_level_values("Card") == card
+    sub = totals.loc[:, keep]
+    if start is not None:
+        sub = sub[sub.index >= month_code(start.year, start.month)]
+    if end is not None:
+        sub = sub[sub.index <= month_code(end.year, end.month)]
+    sub = sub.T.groupby(level="Category", observed=True).sum(min_count=1).T
+    return sub.dropna(how="all").dropna(axis=1, how="all").fillna(0.0)
 
 
 # ── Date range logic (pure, testable — no Streamlit) ─────────────────────────
@@ -336,6 +533,35 @@ def compute_date_range(
     return start, end
 
 
+def covers_whole_months(
+    start: "datetime.date",
+    end: "datetime.date",
+    min_date: "datetime.date",
+    max_date: "datetime.date",
+) -> bool:
+    """True if [start, end] never cuts a month of data in half.
+
+    An edge month still counts as whole when the range reaches past the first/last
+    transaction, so presets that end today (or at max_date) qualify.
+    """
+    import datetime
+    clean_start = start.day == 1 or start <= min_date
+    clean_end   = (end + datetime.timedelta(days=1)).day == 1 or end >= max_date
+    return clean_start and clean_end
+
+
+def slice_date_range(df: pd.DataFrame, start: "datetime.date", end: "datetime.date") -> pd.DataFrame:
+    """Rows with start <= Date <= end (whole days) from a frame sorted by Date.
+
+    Two binary searches on the sorted dates replace a per-row .dt.date comparison.
+    load_all() returns rows in Date order; anything passed here must keep it.
+    """
+    dates = df["Date"].to_numpy()
+    lo = dates.searchsorted(np.datetime64(start, "ns"))
+    hi = dates.searchsorted(np.datetime64(end, "ns") + np.timedelta64(1, "D"))
+    return df.iloc[lo:hi]
+
+
 # ── Date filter widget (Streamlit UI wrapper) ─────────────────────────────────
 DATE_PRESETS = [
     "Last 12 months",
@@ -348,12 +574,13 @@ DATE_PRESETS = [
 ]
 
 
-def date_filter(df: pd.DataFrame, key: str = "date", default_preset: str = "Last 12 months") -> tuple:
-    """Compact preset date dropdown. Returns (start_date, end_date, card)."""
+def date_filter(key: str = "date", default_preset: str = "Last 12 months") -> tuple:
+    """Compact preset date dropdown over load_all()'s range. Returns (start_date, end_date, card)."""
     import datetime
 
-    min_date = df["Date"].min().date()
-    max_date = df["Date"].max().date()
+    options  = load_filter_options()
+    min_date = options["min_date"]
+    max_date = options["max_date"]
     today    = datetime.date.today()
 
     default_index = DATE_PRESETS.index(default_preset) if default_preset in DATE_PRESETS else 0
@@ -365,7 +592,7 @@ def date_filter(df: pd.DataFrame, key: str = "date", default_preset: str = "Last
             label_visibility="collapsed", key=f"{key}_preset",
         )
     with col_card:
-        all_cards = ["All cards"] + sorted(df["Card"].unique().tolist())
+        all_cards = ["All cards"] + options["cards"]
         selected_card = st.selectbox(
             "Card", all_cards,
             label_visibility="collapsed", key=f"{key}_card",
@@ -386,14 +613,11 @@ def date_filter(df: pd.DataFrame, key: str = "date", default_preset: str = "Last
 
 
 # ── Chart helpers ─────────────────────────────────────────────────────────────
-def format_year_month(ym_str: str) -> str:
-    """Convert '2025-11' → 'Nov 2025' for human-readable chart axis labels."""
-    import datetime
-    try:
-        y, m = int(ym_str[:4]), int(ym_str[5:7])
-        return datetime.date(y, m, 1).strftime("%b %Y")
-    except Exception:
-        return ym_str
+@functools.lru_cache(maxsize=2048)
+def format_year_month(ym: int) -> str:
+    """Convert a YearMonth code (see month_code) → 'Nov 2025' for chart axis labels."""
+    year, month = divmod(int(ym), 12)
+    return f"{calendar.month_abbr[month + 1]} {year}"
 
 
 def chart_layout(height=None):
@@ -409,35 +633,70 @@ def chart_layout(height=None):
 
 # ── Subscription detection ────────────────────────────────────────────────────
 def detect_subscriptions(df: pd.DataFrame, min_occurrences: int = 2) -> pd.DataFrame:
-    results = []
-    for merchant, group in df.groupby("Description"):
-        if len(group) < min_occurrences:
-            continue
-        dates   = group["Date"].sort_values().reset_index(drop=True)
-        amounts = group["Amount"]
-        gaps    = dates.diff().dropna().dt.days
-        if len(gaps) == 0:
-            continue
-        avg_gap = gaps.mean()
-        std_gap = gaps.std() if len(gaps) > 1 else 0
-        if   5   <= avg_gap <= 9   and std_gap <= 2:  cadence, me = "Weekly",    amounts.mean() * 4.33
-        elif 25  <= avg_gap <= 35  and std_gap <= 5:  cadence, me = "Monthly",   amounts.mean()
-        elif 85  <= avg_gap <= 95  and std_gap <= 7:  cadence, me = "Quarterly", amounts.mean() / 3
-        elif 355 <= avg_gap <= 375 and std_gap <= 10: cadence, me = "Annual",    amounts.mean() / 12
-        else: continue
-        if (amounts.std() / amounts.mean() if amounts.mean() > 0 else 1) > 0.15:
-            continue
-        results.append({
-            "Merchant": merchant, "Cadence": cadence,
-            "Occurrences": len(group), "Avg Charge": amounts.mean(),
-            "Est Monthly Cost": me,
-            "First Seen": dates.iloc[0].date(),
-            "Last Seen":  dates.iloc[-1].date(),
-        })
-    if not results:
+    # One pass over rows sorted by (merchant, date): per-merchant charge and gap
+    # statistics come from bincount over the factorized merchant codes and the
+    # cadence rules are evaluated as array masks, so nothing loops per merchant.
+    df = df.dropna(subset=["Description"]).sort_values(["Description", "Date"], kind="mergesort")
+    if df.empty:
+        return pd.DataFrame()
+    codes, merchants = pd.factorize(df["Description"])
+    n_groups = len(merchants)
+    dates    = df["Date"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    amounts  = df["Amount"].to_numpy(dtype=np.float64)
+
+    counts = np.bincount(codes, minlength=n_groups)
+    firsts = np.cumsum(counts) - counts
+    lasts  = firsts + counts - 1
+
+    # Day gaps between consecutive charges of the same merchant
+    same_merchant = codes[1:] == codes[:-1]
+    gap_codes = codes[1:][same_merchant]
+    gaps      = (np.diff(dates) // 86_400_000_000_000)[same_merchant].astype(np.float64)
+    n_gaps    = np.bincount(gap_codes, minlength=n_groups)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        amt_mean = np.bincount(codes, weights=amounts, minlength=n_groups) / counts
+        amt_std  = np.sqrt(
+            np.bincount(codes, weights=(amounts - amt_mean[codes]) ** 2, minlength=n_groups) / (counts - 1)
+        )
+        gap_mean = np.bincount(gap_codes, weights=gaps, minlength=n_groups) / n_gaps
+        gap_std  = np.sqrt(
+            np.bincount(gap_codes, weights=(gaps - gap_mean[gap_codes]) ** 2, minlength=n_groups) / (n_gaps - 1)
+        )
+    gap_std = np.where(n_gaps > 1, gap_std, 0.0)
+
+    # Cadence rules applied to every merchant at once; the first matching bin
+    # wins, as in an if/elif chain.
+    cadence_bins = [
+        ("Weekly",    5,   9,   2,  amt_mean * 4.33),
+        ("Monthly",   25,  35,  5,  amt_mean),
+        ("Quarterly", 85,  95,  7,  amt_mean / 3),
+        ("Annual",    355, 375, 10, amt_mean / 12),
+    ]
+    conds = [
+        (gap_mean >= lo) & (gap_mean <= hi) & (gap_std <= max_std)
+        for _, lo, hi, max_std, _ in cadence_bins
+    ]
+    cadence = np.select(conds, [name for name, *_ in cadence_bins], default="")
+    monthly = np.select(conds, [cost for *_, cost in cadence_bins], default=np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cv = np.where(amt_mean > 0, amt_std / amt_mean, 1.0)
+
+    keep = np.flatnonzero(
+        (counts >= min_occurrences) & (n_gaps > 0) & (cadence != "") & ~(cv > 0.15)
+    )
+    if not len(keep):
         return pd.DataFrame()
     return (
-        pd.DataFrame(results)
+        pd.DataFrame({
+            "Merchant": np.asarray(merchants, dtype=object)[keep],
+            "Cadence": cadence[keep].astype(object),
+            "Occurrences": counts[keep].astype(np.int64),
+            "Avg Charge": amt_mean[keep],
+            "Est Monthly Cost": monthly[keep],
+            "First Seen": pd.to_datetime(dates[firsts[keep]]).date,
+            "Last Seen":  pd.to_datetime(dates[lasts[keep]]).date,
+        })
         .sort_values("Est Monthly Cost", ascending=False)
         .reset_index(drop=True)
     )
@@ -453,22 +712,28 @@ def render_drilldown(df: pd.DataFrame, title: str) -> None:
         return
 
     total = df["Amount"].sum()
-    rows_html = ""
-    for _, row in df.iterrows():
-        date_str = row["Date"].strftime("%b %d, %Y") if hasattr(row["Date"], "strftime") else str(row["Date"])
-        card     = row.get("Card", "")
-        rows_html += (
-            f"<tr style='border-bottom:1px solid #F1F5F9;'>"
-            f"<td style='padding:10px 16px;font-family:\"DM Sans\",sans-serif;font-size:13px;"
-            f"color:#64748B;white-space:nowrap;'>{date_str}</td>"
-            f"<td style='padding:10px 16px;font-family:\"DM Sans\",sans-serif;font-size:14px;"
-            f"color:#0F172A;font-weight:500;'>{row['Description']}</td>"
-            f"<td style='padding:10px 16px;font-family:\"DM Sans\",sans-serif;font-size:13px;"
-            f"color:#94A3B8;'>{card}</td>"
-            f"<td style='padding:10px 16px;font-family:\"DM Mono\",monospace;font-size:14px;"
-            f"color:#0F172A;text-align:right;'>${row['Amount']:,.2f}</td>"
-            f"</tr>"
-        )
+    dates = (
+        df["Date"].dt.strftime("%b %d, %Y")
+        if pd.api.types.is_datetime64_any_dtype(df["Date"])
+        else df["Date"].astype(str)
+    )
+    cards = df["Card"] if "Card" in df.columns else [""] * len(df)
+    row_tpl = (
+        "<tr style='border-bottom:1px solid #F1F5F9;'>"
+        "<td style='padding:10px 16px;font-family:\"DM Sans\",sans-serif;font-size:13px;"
+        "color:#64748B;white-space:nowrap;'>{0}</td>"
+        "<td style='padding:10px 16px;font-family:\"DM Sans\",sans-serif;font-size:14px;"
+        "color:#0F172A;font-weight:500;'>{1}</td>"
+        "<td style='padding:10px 16px;font-family:\"DM Sans\",sans-serif;font-size:13px;"
+        "color:#94A3B8;'>{2}</td>"
+        "<td style='padding:10px 16px;font-family:\"DM Mono\",monospace;font-size:14px;"
+        "color:#0F172A;text-align:right;'>${3:,.2f}</td>"
+        "</tr>"
+    )
+    # One join over the columns instead of repeated += on a growing string
+    rows_html = "".join(
+        row_tpl.format(*fields) for fields in zip(dates, df["Description"], cards, df["Amount"])
+    )
     rows_html += (
         f"<tr style='background:#F8FAFC;'>"
         f"<td colspan='3' style='padding:10px 16px;font-family:\"DM Sans\",sans-serif;font-size:12px;"
@@ -499,6 +764,17 @@ def render_drilldown(df: pd.DataFrame, title: str) -> None:
 
 
 # ── Shared UI component helpers ───────────────────────────────────────────────
+@functools.lru_cache(maxsize=None)
+def transfer_keyword_chips() -> str:
+    """Return HTML chips for the built-in TRANSFER_KEYWORDS, built once (the list is static)."""
+    return " ".join(
+        f"<span style='font-family:\"DM Mono\",monospace;font-size:12px;background:#F1F5F9;"
+        f"color:#1B3A6B;padding:3px 10px;border-radius:99px;border:1px solid #E2E8F0;"
+        f"display:inline-block;margin:3px 2px;'>{kw}</span>"
+        for kw in sorted(TRANSFER_KEYWORDS)
+    )
+
+
 def render_stat_card(label: str, value: str, sub: str = None, value_color: str = "#0F172A") -> str:
     """Return HTML for a small metric card. Render with unsafe_allow_html=True.
 
@@ -554,39 +830,40 @@ def check_data_warnings() -> None:
 
 # ── Insights engine ───────────────────────────────────────────────────────────
 def compute_insights(df: pd.DataFrame) -> list:
-    if df.empty or df["YearMonth"].nunique() < 2:
+    periods = np.unique(df["YearMonth"].to_numpy()) if not df.empty else []
+    if len(periods) < 2:
         return []
 
-    current_period   = df["YearMonth"].max()
-    baseline_periods = sorted([p for p in df["YearMonth"].unique() if p < current_period])[-3:]
-    if not baseline_periods:
-        return []
+    # YearMonth codes sort chronologically: last is current, up to 3 before it the baseline
+    current_period   = periods[-1]
+    baseline_periods = periods[-4:-1]
 
     current_df  = df[df["YearMonth"] == current_period]
     baseline_df = df[df["YearMonth"].isin(baseline_periods)]
-    current_by_cat  = current_df.groupby("Category")["Amount"].sum()
-    baseline_by_cat = baseline_df.groupby("Category")["Amount"].sum() / len(baseline_periods)
+    current_by_cat  = current_df.groupby("Category", observed=True)["Amount"].sum()
+    baseline_by_cat = baseline_df.groupby("Category", observed=True)["Amount"].sum() / len(baseline_periods)
+
+    # Threshold test for every category at once; only the hits are turned into dicts
+    cats          = current_by_cat.index.union(baseline_by_cat.index)
+    this_month    = current_by_cat.reindex(cats, fill_value=0).to_numpy()
+    baseline      = baseline_by_cat.reindex(cats, fill_value=0).to_numpy()
+    dollar_change = this_month - baseline
+    pct_change    = np.divide(dollar_change, baseline, out=(this_month > 0).astype(float), where=baseline > 0)
+    hit = (np.abs(pct_change) >= 0.20) & (np.abs(dollar_change) >= 25) & (this_month != 0)
 
     insights = []
-    for cat in set(current_by_cat.index) | set(baseline_by_cat.index):
-        this_month    = current_by_cat.get(cat, 0)
-        baseline      = baseline_by_cat.get(cat, 0)
-        dollar_change = this_month - baseline
-        pct_change    = dollar_change / baseline if baseline > 0 else (1.0 if this_month > 0 else 0)
-        if abs(pct_change) >= 0.20 and abs(dollar_change) >= 25:
-            if this_month == 0:
-                continue
-            indicator = "spike" if dollar_change > 0 else "drop"
-            insights.append({
-                "type": "category", "category": cat,
-                "headline": f"{cat} {'up' if indicator == 'spike' else 'down'} {abs(pct_change) * 100:.0f}% vs avg",
-                "dollar_amount": this_month, "dollar_change": dollar_change,
-                "pct_change": pct_change, "indicator": indicator,
-            })
+    for cat, amount, change, pct in zip(cats[hit], this_month[hit], dollar_change[hit], pct_change[hit]):
+        indicator = "spike" if change > 0 else "drop"
+        insights.append({
+            "type": "category", "category": cat,
+            "headline": f"{cat} {'up' if indicator == 'spike' else 'down'} {abs(pct) * 100:.0f}% vs avg",
+            "dollar_amount": amount, "dollar_change": change,
+            "pct_change": pct, "indicator": indicator,
+        })
 
     # Top merchant this month
     if not current_df.empty:
-        top = current_df.groupby("Description")["Amount"].sum().nlargest(1)
+        top = current_df.groupby("Description", observed=True)["Amount"].sum().nlargest(1)
         if len(top) > 0:
             insights.append({
                 "type": "merchant", "category": "Top Merchant",
@@ -600,8 +877,10 @@ def compute_insights(df: pd.DataFrame) -> list:
 
 
 # ── Global CSS ────────────────────────────────────────────────────────────────
-def inject_global_css(accent: str = ACCENT) -> None:
-    st.markdown(f"""
+@functools.lru_cache(maxsize=None)
+def _global_css(accent: str) -> str:
+    """The app-wide <style> block; built once per accent colour, not per rerun."""
+    return f"""
 <style>
 @import url('https://fonts.googleapis.com/css2?family=DM+Mono:wght@400;500&family=DM+Sans:ital,wght@0,400;0,500;0,600;0,700&display=swap');
 
@@ -795,4 +1074,8 @@ button[data-testid="baseButton-secondary"]:hover {{
 }}
 
 </style>
-""", unsafe_allow_html=True)
+"""
+
+
+def inject_global_css(accent: str = ACCENT) -> None:
+    st.markdown(_global_css(accent), unsafe_allow_html=True)